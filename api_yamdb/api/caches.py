@@ -0,0 +1,149 @@
+import time
+from hashlib import md5
+from typing import Any, Collection, Optional
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db.models import Model
+from rest_framework.request import Request
+
+from constants import (
+    API_CACHE,
+    CATEGORIES_RESOURCE,
+    GENRES_RESOURCE,
+    SLUG_CACHE_CHECK_INTERVAL,
+)
+from reviews.models import Category, Genre
+
+api_cache: BaseCache = caches[API_CACHE]
+
+
+def get_version_key(resource: str) -> str:
+    """Возвращает ключ, под которым хранится версия ресурса."""
+    return f'version:{resource}'
+
+
+def get_cache_version(resource: str) -> int:
+    """
+    Возвращает текущую версию ресурса.
+    Версия не истекает, а при вытеснении из кэша создается заново.
+    """
+    return api_cache.get_or_set(
+        get_version_key(resource), time.time_ns, timeout=None
+    )
+
+
+def bump_cache_version(*resources: str) -> None:
+    """
+    Меняет версию ресурсов, делая недействительными
+    все закэшированные для них данные за одну запись.
+    Версия берется из времени, поэтому не повторяется
+    даже после вытеснения ключа из кэша.
+    """
+    api_cache.set_many(
+        {
+            get_version_key(resource): time.time_ns()
+            for resource in resources
+        },
+        timeout=None,
+    )
+
+
+def get_list_cache_key(
+        resource: str, version: int, request: Request,
+        query_params: Collection[str],
+) -> str:
+    """
+    Формирует ключ кэша списка ресурса по версии ресурса,
+    адресу и нормализованной строке запроса. В ключ входят
+    только параметры query_params, которые понимает представление,
+    поэтому произвольные параметры не создают новых ключей.
+    """
+    query: str = urlencode(sorted(
+        (param, value)
+        for param, values in request.query_params.lists()
+        if param in query_params
+        for value in values
+    ))
+    url: str = request.build_absolute_uri(request.path)
+    digest: str = md5(f'{url}?{query}'.encode()).hexdigest()
+    return f'list:{resource}:{version}:{digest}'
+
+
+class SlugCache:
+    """
+    Кэш слаг -> объект небольшой и редко изменяемой модели
+    в памяти процесса. Изменения в этом процессе сбрасывают
+    кэш сразу, а изменения в других процессах - по версии ресурса
+    в общем кэше, которая проверяется не чаще, чем раз
+    в SLUG_CACHE_CHECK_INTERVAL секунд. Неизвестные слаги
+    не обращаются к базе данных, поэтому неверные данные
+    не вызывают перезагрузку кэша.
+    """
+    def __init__(self, model: type[Model], resource: str) -> None:
+        self.model: type[Model] = model
+        self.resource: str = resource
+        self.rows: Optional[dict[str, dict[str, Any]]] = None
+        self.version: Optional[int] = None
+        self.checked_at: float = 0
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> 'SlugCache':
+        """
+        Не копирует кэш: сериализаторы DRF копируют аргументы
+        своих полей, а кэш должен быть общим для всего процесса.
+        """
+        return self
+
+    def get(self, slug: str) -> Optional[Model]:
+        """
+        Возвращает новый объект модели по слагу
+        или None, если такого объекта нет.
+        """
+        row: Optional[dict[str, Any]] = self.get_rows().get(slug)
+        if row is None:
+            return None
+        return self.model.from_db(
+            self.model.objects.db, list(row), list(row.values())
+        )
+
+    def get_rows(self) -> dict[str, dict[str, Any]]:
+        """
+        Возвращает строки кэша, перезагружая их
+        при смене версии ресурса.
+        """
+        rows: Optional[dict[str, dict[str, Any]]] = self.rows
+        now: float = time.monotonic()
+        if rows is not None and (
+            now - self.checked_at <= SLUG_CACHE_CHECK_INTERVAL
+        ):
+            return rows
+        version: int = get_cache_version(self.resource)
+        if rows is not None and version == self.version:
+            self.checked_at = now
+            return rows
+        return self.load(version)
+
+    def load(self, version: int) -> dict[str, dict[str, Any]]:
+        """
+        Загружает все объекты модели одним запросом.
+        Версия читается до загрузки, чтобы изменения,
+        сделанные во время нее, привели к повторной загрузке.
+        """
+        rows: dict[str, dict[str, Any]] = {
+            row['slug']: row
+            for row in self.model.objects.values(
+                *(field.attname for field in self.model._meta.concrete_fields)
+            )
+        }
+        self.rows, self.version = rows, version
+        self.checked_at = time.monotonic()
+        return rows
+
+    def clear(self) -> None:
+        """Сбрасывает кэш после изменения объектов в этом процессе."""
+        self.rows = None
+
+
+category_slugs: SlugCache = SlugCache(Category, CATEGORIES_RESOURCE)
+genre_slugs: SlugCache = SlugCache(Genre, GENRES_RESOURCE)
@@ -1,18 +1,221 @@
+from typing import Optional, Union
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramSimilarity
+)
+from django.db.models import (
+    Case, Exists, F, IntegerField, OrderBy, OuterRef, Q, QuerySet, Value,
+    When
+)
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.request import Request
+from rest_framework.views import View
+
+from constants import (
+    FULLTEXT_SEARCH,
+    GENRE_MODE_AND,
+    GENRE_MODE_OR,
+    NAME_SIMILARITY_DEFAULT,
+    NAME_SIMILARITY_MIN,
+    SEARCH_CONFIG,
+    SEARCH_MODE_QUERY_PARAM,
+    TITLE_IDS_MAX_SIZE,
+)
+from reviews.models import Category, Title, TitleGenre
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Фильтр по списку чисел, перечисленных через запятую."""
+    ...
+
 
-from reviews.models import Title
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Фильтр по списку строк, перечисленных через запятую."""
+    ...
 
 
 class TitleFilter(filters.FilterSet):
     """
     Позволяет фильтровать объекты модели Title
-    по поля genre, category, year, name.
+    по поля genre, category, year, year_min, year_max, name, ids.
+    Поля genre и category принимают слаги через запятую;
+    жанры объединяются по genre_mode: 'or' - любой из жанров,
+    'and' - все жанры сразу.
+    Поле name ищется как подстрока без учета регистра
+    или по триграммному сходству не ниже name_similarity.
     """
-    genre = filters.CharFilter(field_name='genre__slug')
-    category = filters.CharFilter(field_name='category__slug')
+    genre = CharInFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        method='skip_filter',
+        choices=(
+            (GENRE_MODE_OR, GENRE_MODE_OR),
+            (GENRE_MODE_AND, GENRE_MODE_AND),
+        ),
+    )
+    category = CharInFilter(method='filter_category')
     year = filters.NumberFilter(field_name='year')
-    name = filters.CharFilter(field_name='name')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    name = filters.CharFilter(method='filter_name')
+    name_similarity = filters.NumberFilter(
+        method='skip_filter',
+        min_value=NAME_SIMILARITY_MIN,
+        max_value=1,
+    )
+    ids = NumberInFilter(method='filter_ids')
 
     class Meta:
         model = Title
-        fields = ['genre', 'category', 'name', 'year']
+        fields = ['genre', 'category', 'name', 'year', 'year_min', 'year_max']
+
+    def filter_genre(
+            self, queryset: QuerySet, name: str, value: list[str]
+    ) -> QuerySet:
+        """
+        Отбирает произведения с любым или со всеми жанрами из списка.
+        Условия строятся на EXISTS по индексу (жанр, произведение),
+        поэтому строки произведений не дублируются и DISTINCT не нужен.
+        """
+        if self.form.cleaned_data.get('genre_mode') != GENRE_MODE_AND:
+            return queryset.filter(Exists(TitleGenre.objects.filter(
+                title=OuterRef('pk'), genre__slug__in=value
+            )))
+        for slug in set(value):
+            queryset = queryset.filter(Exists(TitleGenre.objects.filter(
+                title=OuterRef('pk'), genre__slug=slug
+            )))
+        return queryset
+
+    def filter_category(
+            self, queryset: QuerySet, name: str, value: list[str]
+    ) -> QuerySet:
+        """
+        Отбирает произведения любой из категорий списка.
+        У произведения одна категория, поэтому условие
+        на id категорий обслуживается индексом (категория, год).
+        """
+        return queryset.filter(category__in=Category.objects.filter(
+            slug__in=value
+        ).values('pk'))
+
+    def filter_name(
+            self, queryset: QuerySet, name: str, value: str
+    ) -> QuerySet:
+        """
+        Отбирает произведения, название которых содержит value
+        или похоже на него, и упорядочивает их по сходству.
+        Подстрока ищется через ILIKE, а не icontains с UPPER,
+        поэтому оба условия обслуживаются триграммным GIN-индексом.
+        """
+        threshold: float = (
+            self.form.cleaned_data.get('name_similarity')
+            or NAME_SIMILARITY_DEFAULT
+        )
+        return (
+            queryset
+            .annotate(similarity=TrigramSimilarity('name', value))
+            .filter(
+                Q(name__ilike_contains=value)
+                | Q(name__trigram_similar=value, similarity__gte=threshold)
+            )
+            .order_by('-similarity', *queryset.query.order_by)
+        )
+
+    def filter_ids(
+            self, queryset: QuerySet, name: str, value: list[int]
+    ) -> QuerySet:
+        """Отбирает произведения по списку id в порядке этого списка."""
+        if len(value) > TITLE_IDS_MAX_SIZE:
+            raise ValidationError({
+                name: 'Количество id не должно превышать '
+                f'{TITLE_IDS_MAX_SIZE}.'
+            })
+        return queryset.filter(pk__in=value).order_by(Case(
+            *(
+                When(pk=pk, then=Value(position))
+                for position, pk in enumerate(value)
+            ),
+            output_field=IntegerField(),
+        ))
+
+    def skip_filter(
+            self, queryset: QuerySet, name: str, value: float
+    ) -> QuerySet:
+        """Не фильтрует queryset: значение используется другими полями."""
+        return queryset
+
+
+class TitleSearchFilter(SearchFilter):
+    """
+    Поиск по произведениям. С параметром 'search_mode=fulltext'
+    выполняет полнотекстовый поиск по индексированному поисковому
+    вектору и упорядочивает результаты по релевантности.
+    """
+    def filter_queryset(
+            self, request: Request, queryset: QuerySet, view: View
+    ) -> QuerySet:
+        """Фильтрует queryset по поисковому запросу."""
+        if (
+            request.query_params.get(SEARCH_MODE_QUERY_PARAM)
+            != FULLTEXT_SEARCH
+        ):
+            return super().filter_queryset(request, queryset, view)
+        search: str = request.query_params.get(self.search_param, '').strip()
+        if not search:
+            return queryset
+        query: SearchQuery = SearchQuery(
+            search, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return (
+            queryset
+            .filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', *queryset.query.order_by)
+        )
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """
+    Сортировка произведений параметром 'ordering' по рейтингу,
+    взвешенному рейтингу, году и названию. Каждый вариант
+    обслуживается своим индексом, а id в конце делает порядок
+    детерминированным.
+    Произведения без рейтинга всегда идут последними.
+    """
+    ordering_fields = ('rating', 'weighted_rating', 'year', 'name')
+    orderings: dict[str, tuple[Union[str, OrderBy], ...]] = {
+        'rating': (F('rating').asc(nulls_last=True), 'id'),
+        '-rating': (F('rating').desc(nulls_last=True), 'id'),
+        'weighted_rating': (
+            F('weighted_rating').asc(nulls_last=True), 'id'
+        ),
+        '-weighted_rating': (
+            F('weighted_rating').desc(nulls_last=True), 'id'
+        ),
+        'year': ('year', '-id'),
+        '-year': ('-year', 'id'),
+        'name': ('name', 'id'),
+        '-name': ('-name', '-id'),
+    }
+
+    def get_valid_fields(
+            self, queryset: QuerySet, view: View,
+            context: Optional[dict] = None
+    ) -> list[tuple[str, str]]:
+        """Возвращает поля, доступные для сортировки."""
+        return [(field, field) for field in self.ordering_fields]
+
+    def filter_queryset(
+            self, request: Request, queryset: QuerySet, view: View
+    ) -> QuerySet:
+        """Сортирует queryset по выбранному варианту."""
+        ordering: Optional[tuple[Union[str, OrderBy], ...]] = (
+            self.orderings.get(
+                request.query_params.get(self.ordering_param, '').strip()
+            )
+        )
+        if ordering is None:
+            return queryset
+        return queryset.order_by(*ordering)
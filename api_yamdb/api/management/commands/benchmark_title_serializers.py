@@ -0,0 +1,102 @@
+from time import perf_counter
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from api.serializers import TitleRowSerializer, TitleSerializer
+from reviews.models import Category, Genre, Title, TitleGenre
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает время сериализации списка произведений
+    сериализаторами TitleSerializer и TitleRowSerializer.
+    Тестовые произведения создаются в транзакции,
+    которая откатывается после замеров.
+    """
+    help: str = (
+        'Сравнивает скорость TitleSerializer и TitleRowSerializer '
+        'на временных данных'
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            '--rows', type=int, default=200,
+            help='Количество произведений в списке',
+        )
+        parser.add_argument(
+            '--repeats', type=int, default=5,
+            help='Количество замеров, из которых берется лучший',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Создает данные, выполняет замеры и откатывает транзакцию."""
+        rows_count: int = options['rows']
+        repeats: int = options['repeats']
+        with transaction.atomic():
+            self.create_titles(rows_count)
+            queryset = Title.objects.order_by('-year', 'id')
+            instances: list[Title] = list(
+                queryset
+                .select_related('category')
+                .prefetch_related(
+                    Prefetch('genre', queryset=Genre.objects.order_by('id'))
+                )
+            )
+            rows: list[dict[str, Any]] = list(queryset.values(
+                *TitleRowSerializer.get_columns(TitleSerializer.Meta.fields)
+            ))
+            timings: dict[str, float] = {
+                'TitleSerializer': self.measure(
+                    lambda: TitleSerializer(instances, many=True).data,
+                    repeats,
+                ),
+                'TitleRowSerializer': self.measure(
+                    lambda: TitleRowSerializer(rows, many=True).data,
+                    repeats,
+                ),
+            }
+            transaction.set_rollback(True)
+        for name, timing in timings.items():
+            self.stdout.write(
+                f'{name}: {timing / rows_count * 10 ** 6:.1f} мкс на строку'
+            )
+
+    @staticmethod
+    def create_titles(rows_count: int) -> None:
+        """Создает произведения с категорией и тремя жанрами."""
+        category: Category = Category.objects.create(
+            name='Бенчмарк', slug='benchmark-category'
+        )
+        genres: list[Genre] = Genre.objects.bulk_create(
+            Genre(name=f'Бенчмарк {idx}', slug=f'benchmark-genre-{idx}')
+            for idx in range(3)
+        )
+        titles: list[Title] = Title.objects.bulk_create(
+            Title(
+                name=f'Произведение {idx}',
+                year=1900 + idx % 100,
+                description='Описание произведения',
+                category=category,
+                rating=idx % 10,
+            )
+            for idx in range(rows_count)
+        )
+        TitleGenre.objects.bulk_create(
+            TitleGenre(title=title, genre=genre)
+            for title in titles
+            for genre in genres
+        )
+
+    @staticmethod
+    def measure(serialize: Callable[[], Any], repeats: int) -> float:
+        """Возвращает лучшее время из нескольких запусков."""
+        timings: list[float] = []
+        for _ in range(repeats):
+            started: float = perf_counter()
+            serialize()
+            timings.append(perf_counter() - started)
+        return min(timings)
@@ -1,12 +1,33 @@
+from datetime import datetime, timezone
+from hashlib import md5
+from typing import Any, Callable, Optional, Union
+
+from django.db.models import (
+    Count, F, Max, Model, Prefetch, QuerySet, Subquery
+)
+from django.db.models.expressions import Combinable
+from django.db.models.functions import Coalesce, Greatest
+from django.http.response import HttpResponseBase
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
     AllowAny,
     BasePermission,
 )
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
 
+from .caches import api_cache, get_cache_version, get_list_cache_key
 from .permissions import IsAdminOnly
+from constants import FIELDS_QUERY_PARAM
+from reviews.models import Genre, Title, TitleRanking
 
 
 class LookUpSlugFieldMixin:
@@ -33,6 +54,287 @@ class CreateListDestroyViewSet(
     ...
 
 
+class CachedListMixin:
+    """
+    Кэширует ответы на запросы списка от анонимных пользователей.
+    Ключ кэша содержит версию ресурса 'cache_resource',
+    которая меняется при любом изменении связанных данных,
+    и параметры запроса, которые понимают фильтры и пагинация
+    представления или перечислены в 'cache_query_params'.
+    """
+    cache_resource: Optional[str] = None
+    cache_query_params: tuple[str, ...] = ()
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Возвращает список объектов из кэша или формирует его."""
+        if not request.user.is_anonymous:
+            return super().list(request, *args, **kwargs)
+        key: str = get_list_cache_key(
+            self.cache_resource, self.get_resource_version(), request,
+            self.get_cache_query_params(),
+        )
+        data: Optional[dict[str, Any]] = api_cache.get(key)
+        if data is not None:
+            return Response(data)
+        response: Response = super().list(request, *args, **kwargs)
+        api_cache.set(key, response.data)
+        return response
+
+    def get_resource_version(self) -> int:
+        """
+        Читает версию ресурса один раз за запрос:
+        валидаторы ответа и ключ кэша используют одну версию.
+        """
+        if not hasattr(self, '_resource_version'):
+            self._resource_version: int = get_cache_version(
+                self.cache_resource
+            )
+        return self._resource_version
+
+    def get_cache_query_params(self) -> set[str]:
+        """
+        Возвращает параметры запроса, которые влияют на ответ:
+        поля набора фильтров, параметры поиска, сортировки
+        и пагинации и дополнительные параметры представления.
+        """
+        params: set[str] = set(self.cache_query_params)
+        filterset_class: Optional[type] = getattr(
+            self, 'filterset_class', None
+        )
+        if filterset_class is not None:
+            params.update(filterset_class.base_filters)
+        sources: list[Any] = [*self.filter_backends, self.paginator]
+        for source in sources:
+            for name in (
+                'search_param', 'ordering_param',
+                'page_query_param', 'page_size_query_param',
+                'cursor_query_param',
+            ):
+                param: Optional[str] = getattr(source, name, None)
+                if param:
+                    params.add(param)
+        return params
+
+
+class ConditionalGetMixin:
+    """
+    Добавляет в ответы на GET-запросы заголовки ETag и Last-Modified
+    и отвечает 304 Not Modified, если данные не изменились.
+    Валидаторы вычисляются по дате изменения объектов
+    без загрузки и сериализации самих объектов. Даты изменения
+    связанных объектов, данные которых входят в ответ, перечисляются
+    в 'related_modified_fields'.
+    """
+    modified_field: str = 'modified_date'
+    related_modified_fields: tuple[str, ...] = ()
+
+    def get_modified_expression(self) -> Combinable:
+        """
+        Возвращает выражение даты изменения объекта
+        с учетом дат изменения связанных объектов.
+        """
+        if not self.related_modified_fields:
+            return F(self.modified_field)
+        return Greatest(self.modified_field, *self.related_modified_fields)
+
+    def list(
+            self, request: Request, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        """Возвращает список объектов с учетом условных заголовков."""
+        return self.get_conditional_response(
+            request, self.get_list_validators(), super().list,
+            *args, **kwargs
+        )
+
+    def get_list_validators(self) -> dict[str, Any]:
+        """
+        Возвращает валидаторы списка. Для ресурсов с версией кэша
+        это сама версия: она меняется при любом изменении данных
+        и хранит время этого изменения. Для остальных - количество
+        и наибольшая дата изменения отфильтрованных объектов.
+        """
+        if getattr(self, 'cache_resource', None) is not None:
+            version: int = self.get_resource_version()
+            return {
+                'version': version,
+                'last_modified': datetime.fromtimestamp(
+                    version / 10 ** 9, tz=timezone.utc
+                ),
+            }
+        return (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aggregate(
+                count=Count('pk'),
+                last_modified=Max(self.get_modified_expression()),
+            )
+        )
+
+    def retrieve(
+            self, request: Request, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        """Возвращает объект с учетом условных заголовков."""
+        lookup_url_kwarg: str = self.lookup_url_kwarg or self.lookup_field
+        last_modified: Optional[datetime] = (
+            self.get_queryset()
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list(self.get_modified_expression(), flat=True)
+            .first()
+        )
+        return self.get_conditional_response(
+            request,
+            {'last_modified': last_modified},
+            super().retrieve,
+            *args,
+            **kwargs,
+        )
+
+    def get_conditional_response(
+            self, request: Request, validators: dict[str, Any],
+            handler: Callable[..., HttpResponseBase],
+            *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        """
+        Сравнивает валидаторы с условными заголовками запроса
+        и вызывает handler, только если ответ изменился.
+        """
+        last_modified: Optional[datetime] = validators['last_modified']
+        if last_modified is None:
+            return handler(request, *args, **kwargs)
+        etag: str = quote_etag(md5(
+            f'{request.get_full_path()}:{request.accepted_media_type}:'
+            f'{sorted(validators.items())}'.encode()
+        ).hexdigest())
+        timestamp: int = int(last_modified.timestamp())
+        response: Optional[HttpResponseBase] = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class NestedResourceMixin:
+    """
+    Ограничивает объекты вложенного ресурса id родителей из URL
+    условием в запросе самих объектов, без загрузки родителя.
+    Существование родителя для списка проверяется тем же запросом,
+    что и валидаторы ConditionalGetMixin, а сам родитель загружается
+    не более одного раза за запрос - при создании объекта.
+    """
+    parent_model: Optional[type[Model]] = None
+    parent_field: Optional[str] = None
+    parent_url_kwargs: dict[str, str] = {}
+
+    def get_parent_filter(self) -> dict[str, Any]:
+        """Возвращает условие на родителя по id из URL."""
+        return {
+            lookup: self.kwargs[url_kwarg]
+            for lookup, url_kwarg in self.parent_url_kwargs.items()
+        }
+
+    def get_queryset(self) -> QuerySet:
+        """Возвращает объекты, принадлежащие родителю из URL."""
+        return super().get_queryset().filter(**{
+            f'{self.parent_field}__{lookup}': value
+            for lookup, value in self.get_parent_filter().items()
+        })
+
+    def get_parent(self) -> Model:
+        """Загружает родителя из URL один раз за запрос."""
+        if not hasattr(self, '_parent'):
+            self._parent: Model = get_object_or_404(
+                self.parent_model, **self.get_parent_filter()
+            )
+        return self._parent
+
+    def get_list_validators(self) -> dict[str, Any]:
+        """
+        Вычисляет валидаторы списка подзапросами к строке родителя:
+        если родителя нет, запрос не вернет строк и ответом будет 404.
+        """
+        children: QuerySet = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .values(self.parent_field)
+        )
+        validators: Optional[dict[str, Any]] = (
+            self.parent_model.objects
+            .filter(**self.get_parent_filter())
+            .values(
+                count=Coalesce(Subquery(
+                    children.annotate(count=Count('pk')).values('count')
+                ), 0),
+                last_modified=Subquery(
+                    children.annotate(
+                        last_modified=Max(self.get_modified_expression())
+                    ).values('last_modified')
+                ),
+            )
+            .first()
+        )
+        if validators is None:
+            raise NotFound
+        return validators
+
+
+class SparseFieldsMixin:
+    """
+    Позволяет ограничить поля ответа на GET-запрос параметром 'fields'.
+    Из базы данных загружаются только столбцы и связи,
+    которые нужны запрошенным полям.
+    """
+    sparse_required_fields: tuple[str, ...] = ('id',)
+
+    def get_requested_fields(self) -> Optional[set[str]]:
+        """Возвращает запрошенные поля или None, если ограничений нет."""
+        fields: Optional[str] = self.request.query_params.get(
+            FIELDS_QUERY_PARAM
+        )
+        if self.request.method != 'GET' or not fields:
+            return None
+        return {field.strip() for field in fields.split(',')} - {''}
+
+    def get_serializer_context(self) -> dict[str, Any]:
+        """Передает сериализатору запрошенные поля."""
+        context: dict[str, Any] = super().get_serializer_context()
+        context['requested_fields'] = self.get_requested_fields()
+        return context
+
+    def restrict_queryset(
+            self, queryset: QuerySet,
+            select_related: tuple[str, ...] = (),
+            prefetch_related: tuple[Union[str, Prefetch], ...] = (),
+    ) -> QuerySet:
+        """
+        Откладывает загрузку незапрошенных столбцов
+        и подгружает только запрошенные связи.
+        """
+        fields: Optional[set[str]] = self.get_requested_fields()
+        if fields is None:
+            return (
+                queryset
+                .select_related(*select_related)
+                .prefetch_related(*prefetch_related)
+            )
+        columns: set[str] = {
+            field.name for field in queryset.model._meta.concrete_fields
+        }
+        return (
+            queryset
+            .only(*(fields & columns).union(self.sparse_required_fields))
+            .select_related(*(
+                field for field in select_related if field in fields
+            ))
+            .prefetch_related(*(
+                lookup for lookup in prefetch_related
+                if getattr(lookup, 'prefetch_to', lookup) in fields
+            ))
+        )
+
+
 class AddPermissionsMixin:
     """Добавляет определенные пермишены для различных методов запроса."""
     def get_permissions(self) -> list[BasePermission]:
@@ -42,8 +344,35 @@ class AddPermissionsMixin:
         return [IsAuthenticatedOrReadOnly(), IsAdminOnly()]
 
 
+class TopTitlesMixin:
+    """
+    Добавляет действие 'top' со списком лучших произведений
+    категории или жанра из заранее рассчитанной таблицы рейтингов.
+    """
+    top_serializer_class: Optional[type[BaseSerializer]] = None
+
+    @action(detail=True, methods=['get'])
+    def top(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Возвращает лучшие произведения группы в порядке их мест."""
+        group = self.get_object()
+        titles: list[Title] = [
+            ranking.title for ranking in (
+                TitleRanking.objects
+                .filter(**{group._meta.model_name: group})
+                .order_by('position')
+                .select_related('title__category')
+                .prefetch_related(Prefetch(
+                    'title__genre', queryset=Genre.objects.order_by('id')
+                ))
+            )
+        ]
+        return Response(self.top_serializer_class(
+            titles, many=True, context=self.get_serializer_context()
+        ).data)
+
+
 class CreateListDestroySearchViewSet(
-    AddPermissionsMixin, CreateListDestroyViewSet
+    CachedListMixin, AddPermissionsMixin, CreateListDestroyViewSet
 ):
     """Миксин для добавления возможности поиска по полю и пермишенов."""
     lookup_field = 'slug'
@@ -0,0 +1,219 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from typing import Any, Optional, Union
+
+from django.core.exceptions import ValidationError
+from django.db.models import Field, Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import View
+
+from constants import CURSOR_PAGINATION, PAGINATION_QUERY_PARAM
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная пагинация по составному ключу сортировки.
+    Курсор хранит значения полей сортировки крайнего объекта страницы,
+    поэтому следующая страница выбирается условием по индексу
+    без OFFSET и без подсчета общего количества объектов.
+    """
+    page_size: int = api_settings.PAGE_SIZE
+    cursor_query_param: str = 'cursor'
+    ordering: tuple[str, ...] = ('-pk',)
+    invalid_cursor_message: str = 'Неверный курсор.'
+
+    def paginate_queryset(
+            self, queryset: QuerySet, request: Request,
+            view: Optional[View] = None
+    ) -> list[Model]:
+        """Возвращает объекты страницы, следующей за курсором."""
+        self.request: Request = request
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        position, self.reverse = self.decode_cursor(request)
+        ordering: tuple[str, ...] = self.ordering
+        if self.reverse:
+            ordering = tuple(self.invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            position = self.clean_position(queryset.model, position)
+            queryset = queryset.filter(
+                self.get_keyset_filter(ordering, position)
+            )
+        results: list[Model] = list(queryset[:self.page_size + 1])
+        self.has_more: bool = len(results) > self.page_size
+        self.page: list[Model] = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+        self.has_cursor: bool = position is not None
+        return self.page
+
+    def get_paginated_response(self, data: list[dict[str, Any]]) -> Response:
+        """Формирует ответ со ссылками на соседние страницы."""
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(
+            self, schema: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Описывает структуру ответа для схемы API."""
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self) -> Optional[str]:
+        """Возвращает ссылку на следующую страницу."""
+        if not self.page or not (self.has_more or self.reverse):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        """Возвращает ссылку на предыдущую страницу."""
+        if not self.page:
+            return None
+        if self.reverse and not self.has_more:
+            return None
+        if not self.reverse and not self.has_cursor:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def invert(field: str) -> str:
+        """Меняет направление сортировки поля на противоположное."""
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def get_keyset_filter(
+            ordering: tuple[str, ...], position: list[Any]
+    ) -> Q:
+        """
+        Строит условие "строго после позиции" для составного ключа:
+        (a > x) OR (a = x AND b > y) OR ... Из OR-цепочки PostgreSQL
+        не выводит границу индекса, поэтому она дополняется условием
+        a >= x (a <= x при убывании), которое ограничивает
+        диапазон чтения индекса по первому полю.
+        """
+        first_name: str = ordering[0].lstrip('-')
+        first_lookup: str = 'lte' if ordering[0].startswith('-') else 'gte'
+        leading_bound: Q = Q(**{f'{first_name}__{first_lookup}': position[0]})
+        keyset_filter: Q = Q(pk__in=[])
+        equal_prefix: Q = Q()
+        for field, value in zip(ordering, position):
+            name: str = field.lstrip('-')
+            lookup: str = 'lt' if field.startswith('-') else 'gt'
+            keyset_filter |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+            equal_prefix &= Q(**{name: value})
+        return leading_bound & keyset_filter
+
+    def clean_position(
+            self, model: type[Model], position: list[Any]
+    ) -> list[Any]:
+        """
+        Приводит значения курсора к типам полей сортировки.
+        Курсор приходит от клиента, поэтому пустые, составные
+        и неприводимые значения считаются неверным курсором.
+        """
+        cleaned: list[Any] = []
+        for field_name, value in zip(self.ordering, position):
+            name: str = field_name.lstrip('-')
+            field: Field = (
+                model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            )
+            if value is None or isinstance(value, (list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                cleaned.append(field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return cleaned
+
+    def encode_cursor(
+            self, instance: Union[Model, dict[str, Any]], reverse: bool
+    ) -> str:
+        """
+        Кодирует позицию объекта или строки values() в курсор
+        и возвращает ссылку с ним.
+        """
+        position: list[Any] = [
+            instance[field.lstrip('-')] if isinstance(instance, dict)
+            else getattr(instance, field.lstrip('-'))
+            for field in self.ordering
+        ]
+        cursor: str = urlsafe_b64encode(
+            json.dumps({'p': position, 'r': int(reverse)}).encode()
+        ).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            cursor,
+        )
+
+    def decode_cursor(
+            self, request: Request
+    ) -> tuple[Optional[list[Any]], bool]:
+        """Возвращает позицию и направление из курсора запроса."""
+        cursor: Optional[str] = request.query_params.get(
+            self.cursor_query_param
+        )
+        if cursor is None:
+            return None, False
+        try:
+            data: dict[str, Any] = json.loads(urlsafe_b64decode(cursor))
+            position: list[Any] = data['p']
+            reverse: bool = bool(data['r'])
+        except (BinasciiError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class TitlePagination(PageNumberPagination):
+    """
+    Постраничная пагинация произведений с курсорным режимом,
+    который включается параметром запроса 'pagination=cursor'.
+    """
+    cursor_query_param: str = KeysetPagination.cursor_query_param
+
+    def paginate_queryset(
+            self, queryset: QuerySet, request: Request,
+            view: Optional[View] = None
+    ) -> Optional[list[Model]]:
+        """Выбирает режим пагинации и возвращает объекты страницы."""
+        self.cursor_paginator: Optional[KeysetPagination] = None
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = KeysetPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: list[dict[str, Any]]) -> Response:
+        """Формирует ответ в формате выбранного режима пагинации."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def is_cursor_mode(self, request: Request) -> bool:
+        """Проверяет, запрошен ли курсорный режим пагинации."""
+        return (
+            request.query_params.get(PAGINATION_QUERY_PARAM)
+            == CURSOR_PAGINATION
+            or self.cursor_query_param in request.query_params
+        )
@@ -1,14 +1,22 @@
-from typing import Any, Union
+from collections import defaultdict
+from operator import itemgetter
+from typing import Any, Callable, Iterable, Optional, Union
 
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model, QuerySet
 from django.db.utils import IntegrityError
 from rest_framework import serializers, status
 from rest_framework.response import Response
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.settings import api_settings
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleGenre
+)
 
+from .caches import SlugCache, category_slugs, genre_slugs
 from .mixins import LookUpSlugFieldMixin
-from constants import LENGTH_CODE, ADMIN
+from constants import LENGTH_CODE, ADMIN, REVIEW_UNIQUE_CONSTRAINT
 from users.models import User
 
 
@@ -26,15 +34,60 @@ class GenreSerializer(serializers.ModelSerializer, LookUpSlugFieldMixin):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели произведений."""
-    category = serializers.SlugRelatedField(
-        slug_field='slug', queryset=Category.objects.all()
+class CachedSlugRelatedField(serializers.RelatedField):
+    """
+    Поле связи по слагу, которое ищет объект в кэше слагов
+    процесса вместо отдельного запроса к базе данных.
+    """
+    default_error_messages = (
+        serializers.SlugRelatedField.default_error_messages
     )
+
+    def __init__(self, slug_cache: SlugCache, **kwargs: Any) -> None:
+        self.slug_cache: SlugCache = slug_cache
+        super().__init__(**kwargs)
+
+    def get_queryset(self) -> QuerySet:
+        """Возвращает объекты модели для выбора в интерфейсе API."""
+        return self.slug_cache.model.objects.all()
+
+    def to_internal_value(self, data: Any) -> Model:
+        """Возвращает объект по слагу из кэша."""
+        if not isinstance(data, str):
+            self.fail('invalid')
+        instance: Optional[Model] = self.slug_cache.get(data)
+        if instance is None:
+            self.fail('does_not_exist', slug_name='slug', value=data)
+        return instance
+
+    def to_representation(self, value: Model) -> str:
+        """Возвращает слаг объекта."""
+        return value.slug
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Оставляет в сериализаторе только поля,
+    переданные представлением в контексте 'requested_fields'.
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        requested_fields: Optional[set[str]] = self.context.get(
+            'requested_fields'
+        )
+        if requested_fields is not None:
+            for field_name in set(self.fields) - requested_fields:
+                self.fields.pop(field_name)
+
+
+class TitleSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
+    """Сериализатор для модели произведений."""
+    category = CachedSlugRelatedField(category_slugs)
     rating = serializers.IntegerField(read_only=True)
-    genre = serializers.SlugRelatedField(
-        slug_field='slug', queryset=Genre.objects.all(), many=True
-    )
+    weighted_rating = serializers.FloatField(read_only=True)
+    genre = CachedSlugRelatedField(genre_slugs, many=True)
 
     class Meta:
         model = Title
@@ -43,29 +96,166 @@ class TitleSerializer(serializers.ModelSerializer):
             'name',
             'year',
             'rating',
+            'weighted_rating',
             'description',
             'genre',
             'category',
         )
 
     def to_representation(self, instance: Title) -> dict[str, str]:
-        """Готовит данные для отправки в ответе."""
+        """
+        Готовит данные для отправки в ответе.
+        Категория и жанры берутся из объектов, загруженных
+        через select_related и prefetch_related.
+        """
         representation: dict[str, str] = super().to_representation(instance)
-        representation['category'] = {
-            'name': instance.category.name,
-            'slug': instance.category.slug,
-        }
-        representation['genre'] = [
-            {
-                'name': genre.name,
-                'slug': genre.slug,
+        if 'category' in representation:
+            category: Category = instance.category
+            representation['category'] = category and {
+                'name': category.name,
+                'slug': category.slug,
             }
-            for genre in instance.genre.all()
-        ]
+        if 'genre' in representation:
+            representation['genre'] = [
+                {
+                    'name': genre.name,
+                    'slug': genre.slug,
+                }
+                for genre in instance.genre.all()
+            ]
         return representation
 
 
-class CommentSerializers(serializers.ModelSerializer):
+class TitleRowListSerializer(serializers.ListSerializer):
+    """
+    Список для TitleRowSerializer: загружает жанры всех
+    произведений страницы одним запросом.
+    """
+    def to_representation(self, data: Iterable[dict[str, Any]]) -> list:
+        """Готовит данные всех произведений страницы."""
+        rows: list[dict[str, Any]] = list(data)
+        if 'genre' in self.child.field_names:
+            self.child.genres = self.child.get_genres(
+                [row['id'] for row in rows]
+            )
+        return [self.child.to_representation(row) for row in rows]
+
+
+class TitleRowSerializer(serializers.BaseSerializer):
+    """
+    Быстрый сериализатор произведений только для чтения.
+    Строит ответ из строк values() без полей ModelSerializer;
+    результат совпадает с ответом TitleSerializer.
+    """
+    columns: dict[str, tuple[str, ...]] = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating',),
+        'weighted_rating': ('weighted_rating',),
+        'description': ('description',),
+        'genre': (),
+        'category': ('category__name', 'category__slug'),
+    }
+
+    class Meta:
+        list_serializer_class = TitleRowListSerializer
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        requested_fields: Optional[set[str]] = self.context.get(
+            'requested_fields'
+        )
+        self.field_names: list[str] = [
+            field for field in TitleSerializer.Meta.fields
+            if requested_fields is None or field in requested_fields
+        ]
+        self.genres: dict[int, list[dict[str, str]]] = {}
+        getters: dict[str, Callable[[dict[str, Any]], Any]] = {
+            'id': itemgetter('id'),
+            'name': itemgetter('name'),
+            'year': itemgetter('year'),
+            'rating': self.get_rating,
+            'weighted_rating': itemgetter('weighted_rating'),
+            'description': itemgetter('description'),
+            'genre': self.get_genre,
+            'category': self.get_category,
+        }
+        self.getters: list[tuple[str, Callable]] = [
+            (field, getters[field]) for field in self.field_names
+        ]
+
+    @classmethod
+    def get_columns(cls, fields: Iterable[str]) -> list[str]:
+        """Возвращает столбцы values(), нужные для полей ответа."""
+        return [
+            column
+            for field in cls.columns
+            if field in fields
+            for column in cls.columns[field]
+        ]
+
+    @staticmethod
+    def get_genres(title_ids: list[int]) -> dict[int, list[dict[str, str]]]:
+        """Возвращает жанры произведений, сгруппированные по их id."""
+        genres: dict[int, list[dict[str, str]]] = defaultdict(list)
+        links: QuerySet = (
+            TitleGenre.objects
+            .filter(title_id__in=title_ids, genre__isnull=False)
+            .order_by('genre_id')
+            .values_list('title_id', 'genre__name', 'genre__slug')
+        )
+        for title_id, name, slug in links:
+            genres[title_id].append({'name': name, 'slug': slug})
+        return genres
+
+    @staticmethod
+    def get_rating(row: dict[str, Any]) -> Optional[int]:
+        """Округляет рейтинг так же, как IntegerField."""
+        rating: Optional[float] = row['rating']
+        return None if rating is None else int(rating)
+
+    def get_genre(self, row: dict[str, Any]) -> list[dict[str, str]]:
+        """Возвращает жанры произведения."""
+        return self.genres.get(row['id'], [])
+
+    @staticmethod
+    def get_category(row: dict[str, Any]) -> Optional[dict[str, str]]:
+        """Возвращает категорию произведения."""
+        if row['category__slug'] is None:
+            return None
+        return {
+            'name': row['category__name'],
+            'slug': row['category__slug'],
+        }
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        """Готовит данные произведения из строки values()."""
+        return {field: getter(row) for field, getter in self.getters}
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для массового создания произведений.
+    Категории и жанры ищутся в кэше слагов процесса.
+    """
+    category = CachedSlugRelatedField(category_slugs)
+    genre = CachedSlugRelatedField(genre_slugs, many=True)
+
+    class Meta:
+        model = Title
+        fields = (
+            'name',
+            'year',
+            'description',
+            'genre',
+            'category',
+        )
+
+
+class CommentSerializers(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для модели Комментариев."""
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
@@ -76,7 +266,9 @@ class CommentSerializers(serializers.ModelSerializer):
         model = Comment
 
 
-class ReviewSerializers(serializers.ModelSerializer):
+class ReviewSerializers(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для модели Отзывов."""
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
@@ -86,15 +278,22 @@ class ReviewSerializers(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
 
-    def validate(self, data: dict[str, Any]) -> dict[str, Any]:
-        """Проверка на то, чтобы пользователь оставлял только один отзыв."""
-        if self.context.get('request').method != 'POST':
-            return data
-        title_id: int = self.context.get('view').kwargs.get('title_id')
-        author: User = self.context.get('request').user
-        if Review.objects.filter(author=author, title=title_id).exists():
-            raise serializers.ValidationError('Вы уже оставили отзыв!!!')
-        return data
+    def create(self, validated_data: dict[str, Any]) -> Review:
+        """
+        Создает отзыв одним INSERT. Второй отзыв пользователя
+        на произведение отклоняет ограничение 'Unique_review'.
+        """
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as error:
+            if REVIEW_UNIQUE_CONSTRAINT not in str(error):
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже оставили отзыв!!!'
+                ]
+            })
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -0,0 +1,58 @@
+from functools import partial
+from typing import Any
+
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .caches import bump_cache_version, category_slugs, genre_slugs
+from constants import CATEGORIES_RESOURCE, GENRES_RESOURCE, TITLES_RESOURCE
+from reviews.models import Category, Genre, Review, Title, TitleGenre
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=TitleGenre)
+@receiver(post_delete, sender=TitleGenre)
+@receiver(m2m_changed, sender=TitleGenre)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_titles_cache(
+        sender: type[Model], action: str = 'post', **kwargs: Any
+) -> None:
+    """
+    Делает недействительным кэш списков произведений.
+    Версия меняется после фиксации транзакции: иначе параллельный
+    запрос успеет закэшировать прежние данные под новой версией.
+    """
+    if action.startswith('post'):
+        transaction.on_commit(partial(bump_cache_version, TITLES_RESOURCE))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres_cache(sender: type[Genre], **kwargs: Any) -> None:
+    """
+    Делает недействительным кэш списков жанров и произведений
+    и кэш слагов жанров после фиксации транзакции.
+    """
+    transaction.on_commit(genre_slugs.clear)
+    transaction.on_commit(
+        partial(bump_cache_version, GENRES_RESOURCE, TITLES_RESOURCE)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories_cache(
+        sender: type[Category], **kwargs: Any
+) -> None:
+    """
+    Делает недействительным кэш списков категорий и произведений
+    и кэш слагов категорий после фиксации транзакции.
+    """
+    transaction.on_commit(category_slugs.clear)
+    transaction.on_commit(
+        partial(bump_cache_version, CATEGORIES_RESOURCE, TITLES_RESOURCE)
+    )
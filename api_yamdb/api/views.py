@@ -1,23 +1,36 @@
-from typing import Any
+from typing import Any, Optional
 
-from django.db.models import Avg, QuerySet
+from django.db import transaction
+from django.db.models import Prefetch, QuerySet
 from django_filters.rest_framework import DjangoFilterBackend
 from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django.utils.crypto import get_random_string
 from rest_framework import generics, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import (
     IsAuthenticated,
     IsAuthenticatedOrReadOnly
 )
 from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
 from rest_framework.request import Request
 from rest_framework_simplejwt.tokens import Token, RefreshToken
 
-from .filters import TitleFilter
-from .mixins import CreateListDestroySearchViewSet, AddPermissionsMixin
+from .caches import bump_cache_version
+from .filters import TitleFilter, TitleOrderingFilter, TitleSearchFilter
+from .mixins import (
+    AddPermissionsMixin,
+    CachedListMixin,
+    ConditionalGetMixin,
+    CreateListDestroySearchViewSet,
+    NestedResourceMixin,
+    SparseFieldsMixin,
+    TopTitlesMixin,
+)
+from .paginations import TitlePagination
 from .permissions import (
     IsAdminOnly,
     IsAdminObject,
@@ -29,19 +42,41 @@ from .serializers import (
     UserTokenSerializer,
     UserSerializer,
     TitleSerializer,
+    TitleBulkSerializer,
+    TitleRowSerializer,
     CategorySerializer,
     GenreSerializer,
     CommentSerializers,
     ReviewSerializers,
 )
 from .utils import send_confirmation_code
-from constants import LENGTH_CODE
-from reviews.models import Title, Category, Genre, Review
+from constants import (
+    CATEGORIES_RESOURCE,
+    FACETS_QUERY_PARAM,
+    FIELDS_QUERY_PARAM,
+    GENRES_RESOURCE,
+    LENGTH_CODE,
+    PAGINATION_QUERY_PARAM,
+    SEARCH_MODE_QUERY_PARAM,
+    TITLES_BULK_MAX_SIZE,
+    TITLES_RESOURCE,
+    TITLE_IDS_QUERY_PARAM,
+)
+from reviews.managers import TitleQuerySet
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleGenre
+)
 from users.models import User
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    NestedResourceMixin,
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet для модели отзывов."""
+    queryset = Review.objects.all()
     serializer_class = ReviewSerializers
     http_method_names = ['get', 'post', 'delete', 'patch']
     permission_classes = [
@@ -50,26 +85,31 @@ class ReviewViewSet(viewsets.ModelViewSet):
         | IsModerator
         | IsAuthor
     ]
-
-    def get_title(self) -> Title:
-        """Получаем произведение."""
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    parent_model = Title
+    parent_field = 'title'
+    parent_url_kwargs = {'pk': 'title_id'}
+    related_modified_fields = ('author__modified_date',)
 
     def get_queryset(self) -> QuerySet:
         """Получаем отзывы для произведения."""
-        return (
-            self.get_title()
-            .reviews.select_related('author')
-            .order_by('-pub_date')
+        return self.restrict_queryset(
+            super().get_queryset().order_by('-pub_date'),
+            select_related=('author',),
         )
 
     def perform_create(self, serializer: ReviewSerializers) -> None:
         """Создаем отзыв.Присваеваем текущего пользователя и произведение."""
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=self.request.user, title=self.get_parent())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    NestedResourceMixin,
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet для модели комментариев."""
+    queryset = Comment.objects.all()
     serializer_class = CommentSerializers
     http_method_names = ['get', 'post', 'delete', 'patch']
     permission_classes = [
@@ -78,53 +118,197 @@ class CommentViewSet(viewsets.ModelViewSet):
         | IsModerator
         | IsAuthor
     ]
-
-    def get_review(self) -> Review:
-        """Получаем отзыв."""
-        return get_object_or_404(Review, pk=self.kwargs.get('review_id'))
+    parent_model = Review
+    parent_field = 'review'
+    parent_url_kwargs = {'pk': 'review_id', 'title_id': 'title_id'}
+    related_modified_fields = ('author__modified_date',)
 
     def get_queryset(self) -> QuerySet:
         """Получаем комментарии для отзыва."""
-        return (
-            self.get_review()
-            .comments.select_related('author')
-            .order_by('-pub_date')
+        return self.restrict_queryset(
+            super().get_queryset().order_by('-pub_date'),
+            select_related=('author',),
         )
 
     def perform_create(self, serializer: CommentSerializers) -> None:
         """Создаем комментарий. Присваеваем текущего пользователя и отзыв."""
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.get_parent())
 
 
-class TitleViewSet(AddPermissionsMixin, viewsets.ModelViewSet):
+class TitleViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
+    SparseFieldsMixin,
+    AddPermissionsMixin,
+    viewsets.ModelViewSet,
+):
     """Представление для работы с объектами модели Title."""
     queryset = Title.objects.all()
     serializer_class = TitleSerializer
     http_method_names = ['get', 'post', 'patch', 'delete']
-    filter_backends = (SearchFilter, DjangoFilterBackend)
+    filter_backends = (
+        TitleSearchFilter, DjangoFilterBackend, TitleOrderingFilter
+    )
     search_fields = ('name', 'genre__slug', 'category__slug')
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
+    cache_resource = TITLES_RESOURCE
+    cache_query_params = (
+        FACETS_QUERY_PARAM,
+        FIELDS_QUERY_PARAM,
+        PAGINATION_QUERY_PARAM,
+        SEARCH_MODE_QUERY_PARAM,
+    )
+    cursor_ordering = ('-year', 'id')
+    sparse_required_fields = ('id', 'year')
 
     def get_queryset(self) -> QuerySet:
-        """Формирует и возвращает queryset."""
-        queryset: QuerySet = super().get_queryset()
-        return (
-            queryset
-            .order_by('-year')
-            .annotate(rating=Avg('reviews__score'))
+        """
+        Формирует и возвращает queryset.
+        Для списка возвращает строки values() с нужными столбцами,
+        жанры к которым загружает TitleRowSerializer.
+        """
+        queryset: QuerySet = super().get_queryset().order_by(
+            *self.cursor_ordering
+        )
+        if self.action == 'list':
+            fields: set[str] = (
+                self.get_requested_fields()
+                or set(TitleSerializer.Meta.fields)
+            )
+            return queryset.values(*TitleRowSerializer.get_columns(
+                fields.union(self.sparse_required_fields)
+            ))
+        return self.restrict_queryset(
+            queryset,
+            select_related=('category',),
+            prefetch_related=(
+                Prefetch('genre', queryset=Genre.objects.order_by('id')),
+            ),
+        )
+
+    def get_serializer_class(self) -> type[BaseSerializer]:
+        """Для списка использует быстрый сериализатор только для чтения."""
+        if self.action == 'list':
+            return TitleRowSerializer
+        return super().get_serializer_class()
+
+    def get_requested_facets(self) -> list[str]:
+        """Возвращает фасеты, запрошенные параметром 'facets'."""
+        facets: list[str] = [
+            facet.strip()
+            for facet in self.request.query_params.get(
+                FACETS_QUERY_PARAM, ''
+            ).split(',')
+            if facet.strip()
+        ]
+        unknown: list[str] = [
+            facet for facet in facets
+            if facet not in TitleQuerySet.facet_fields
+        ]
+        if unknown:
+            raise ValidationError({
+                FACETS_QUERY_PARAM: 'Неизвестные фасеты: '
+                f'{", ".join(unknown)}. Доступны: '
+                f'{", ".join(TitleQuerySet.facet_fields)}.'
+            })
+        return list(dict.fromkeys(facets))
+
+    def get_paginated_response(self, data: list[dict[str, Any]]) -> Response:
+        """
+        Добавляет к странице количество произведений всей
+        отфильтрованной выборки по запрошенным фасетам.
+        """
+        response: Response = super().get_paginated_response(data)
+        facets: list[str] = self.get_requested_facets()
+        if facets:
+            response.data['facets'] = self.filter_queryset(
+                self.get_queryset()
+            ).facet_counts(facets)
+        return response
+
+    def paginate_queryset(self, queryset: QuerySet) -> Optional[list[Title]]:
+        """Не разбивает на страницы выборку произведений по списку id."""
+        if self.request.query_params.get(TITLE_IDS_QUERY_PARAM):
+            return None
+        return super().paginate_queryset(queryset)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request: Request) -> Response:
+        """
+        Создает пакет произведений в одной транзакции.
+        Категории и жанры пакета ищутся в кэше слагов процесса,
+        произведения и связи с жанрами создаются через bulk_create.
+        Ошибки отдельных произведений возвращаются по их индексам
+        и не мешают созданию остальных.
+        """
+        items: list[Any] = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError('Ожидается непустой список произведений.')
+        if len(items) > TITLES_BULK_MAX_SIZE:
+            raise ValidationError(
+                'Количество произведений в пакете не должно превышать '
+                f'{TITLES_BULK_MAX_SIZE}.'
+            )
+        context: dict[str, Any] = self.get_serializer_context()
+        serializers: list[TitleBulkSerializer] = [
+            TitleBulkSerializer(data=item, context=context) for item in items
+        ]
+        errors: list[dict[str, Any]] = [
+            {'index': index, 'errors': serializer.errors}
+            for index, serializer in enumerate(serializers)
+            if not serializer.is_valid()
+        ]
+        valid_data: list[dict[str, Any]] = [
+            serializer.validated_data
+            for serializer in serializers
+            if not serializer.errors
+        ]
+        with transaction.atomic():
+            titles: list[Title] = Title.objects.bulk_create(
+                Title(**{
+                    field: value
+                    for field, value in data.items()
+                    if field != 'genre'
+                })
+                for data in valid_data
+            )
+            TitleGenre.objects.bulk_create(
+                TitleGenre(title=title, genre=genre)
+                for title, data in zip(titles, valid_data)
+                for genre in dict.fromkeys(data['genre'])
+            )
+            created: QuerySet = self.get_queryset().filter(
+                pk__in=[title.pk for title in titles]
+            )
+            created.update_search_vector()
+        bump_cache_version(TITLES_RESOURCE)
+        return Response(
+            {
+                'created': self.get_serializer(created, many=True).data,
+                'errors': errors,
+            },
+            status=(
+                status.HTTP_201_CREATED if titles
+                else status.HTTP_400_BAD_REQUEST
+            ),
         )
 
 
-class CategoryViewSet(CreateListDestroySearchViewSet):
+class CategoryViewSet(TopTitlesMixin, CreateListDestroySearchViewSet):
     """Представление для работы с объектами модели Category."""
     serializer_class = CategorySerializer
+    top_serializer_class = TitleSerializer
     queryset = Category.objects.all().order_by('id', 'name')
+    cache_resource = CATEGORIES_RESOURCE
 
 
-class GenreViewSet(CreateListDestroySearchViewSet):
+class GenreViewSet(TopTitlesMixin, CreateListDestroySearchViewSet):
     """Представление для работы с объектами модели Genre."""
     serializer_class = GenreSerializer
+    top_serializer_class = TitleSerializer
     queryset = Genre.objects.all().order_by('id', 'name')
+    cache_resource = GENRES_RESOURCE
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -4,7 +4,7 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from constants import LIFE_CONFIRMATION_CODE
+from constants import API_CACHE, API_CACHE_TIMEOUT, LIFE_CONFIRMATION_CODE
 
 load_dotenv()
 
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'api',
     'reviews',
@@ -155,5 +156,14 @@ CACHES = {
         'OPTIONS': {
             'TIMEOUT': LIFE_CONFIRMATION_CODE,
         }
-    }
+    },
+    API_CACHE: {
+        'BACKEND': getenv(
+            'API_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': getenv('API_CACHE_LOCATION', 'api_cache_table'),
+        'TIMEOUT': API_CACHE_TIMEOUT,
+    },
 }
+if CACHES[API_CACHE]['BACKEND'].endswith('.DatabaseCache'):
+    CACHES[API_CACHE]['OPTIONS'] = {'MAX_ENTRIES': 10000}
@@ -4,3 +4,45 @@ LENGTH_CODE: int = 6
 USER = 'user'
 MODERATOR = 'moderator'
 ADMIN = 'admin'
+
+PAGINATION_QUERY_PARAM = 'pagination'
+CURSOR_PAGINATION = 'cursor'
+
+SEARCH_MODE_QUERY_PARAM = 'search_mode'
+FULLTEXT_SEARCH = 'fulltext'
+SEARCH_CONFIG = 'russian'
+
+NAME_SIMILARITY_DEFAULT = 0.3
+NAME_SIMILARITY_MIN = 0.3
+
+API_CACHE = 'api'
+API_CACHE_TIMEOUT: int = 600
+TITLES_RESOURCE = 'titles'
+GENRES_RESOURCE = 'genres'
+CATEGORIES_RESOURCE = 'categories'
+
+TITLES_BULK_MAX_SIZE: int = 1000
+
+TITLE_IDS_QUERY_PARAM = 'ids'
+TITLE_IDS_MAX_SIZE: int = 200
+
+FIELDS_QUERY_PARAM = 'fields'
+
+LEADERBOARD_SIZE: int = 20
+
+WEIGHTED_RATING_MIN_VOTES: int = 10
+WEIGHTED_RATING_MEAN_TOLERANCE: float = 0.05
+
+FACETS_QUERY_PARAM = 'facets'
+
+GENRE_MODE_OR = 'or'
+GENRE_MODE_AND = 'and'
+
+SLUG_CACHE_CHECK_INTERVAL: float = 1
+
+REVIEW_UNIQUE_CONSTRAINT = 'Unique_review'
+
+IMPORT_BATCH_SIZE: int = 1000
+IMPORT_FULL_REFRESH_SIZE: int = 5000
+IMPORT_FULL_REFRESH_SHARE: float = 0.5
+EXPORT_CHUNK_SIZE: int = 2000
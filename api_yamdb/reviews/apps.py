@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self) -> None:
+        """Подключает обработчики сигналов и поиски полей приложения."""
+        from . import lookups, signals  # noqa: F401
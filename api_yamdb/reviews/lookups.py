@@ -0,0 +1,40 @@
+from typing import Any
+
+from django.db.models import CharField, Field, lookups
+
+
+@CharField.register_lookup
+class ILikeContains(lookups.PatternLookup):
+    """
+    Поиск подстроки без учета регистра через ILIKE.
+    Встроенный icontains сравнивает UPPER(поле) и не может
+    использовать триграммный GIN-индекс по самому полю,
+    а условие ILIKE '%value%' этим индексом обслуживается.
+    """
+    lookup_name: str = 'ilike_contains'
+    prepare_rhs: bool = False
+
+    def as_sql(self, compiler: Any, connection: Any) -> tuple[str, list]:
+        """Возвращает условие поле ILIKE шаблон."""
+        lhs_sql, params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        params.extend(rhs_params)
+        return f'{lhs_sql} ILIKE {rhs_sql}', params
+
+
+@Field.register_lookup
+class DistinctFrom(lookups.Lookup):
+    """
+    Сравнение IS DISTINCT FROM, в котором NULL равен NULL.
+    Позволяет обновлять только строки, значение которых
+    действительно изменится.
+    """
+    lookup_name: str = 'distinct_from'
+    can_use_none_as_rhs: bool = True
+
+    def as_sql(self, compiler: Any, connection: Any) -> tuple[str, list]:
+        """Возвращает условие поле IS DISTINCT FROM значение."""
+        lhs_sql, params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        params.extend(rhs_params)
+        return f'{lhs_sql} IS DISTINCT FROM {rhs_sql}', params
@@ -0,0 +1,269 @@
+import csv
+import gzip
+import os
+from datetime import datetime
+from tempfile import mkstemp
+from typing import IO, Any, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from constants import EXPORT_CHUNK_SIZE
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Выгружает данные в csv-файлы в формате, который читает import_csv.
+    Строки читаются курсором на стороне сервера порциями по '--chunk-size'
+    и сразу записываются в файл, поэтому расход памяти не зависит
+    от размера таблиц.
+    С параметром '--since' произведения и связи с жанрами отбираются
+    по дате изменения произведения. Она меняется и вместе с данными,
+    которых нет в titles.csv: описанием, рейтингами и поисковым
+    вектором. Поэтому выгрузка может содержать строки, выгруженные
+    столбцы которых не изменились; повторный импорт таких строк
+    в режиме '--upsert' их не записывает.
+    Все таблицы читаются в одной транзакции REPEATABLE READ,
+    поэтому файлы описывают один согласованный снимок базы данных.
+    """
+    help: str = 'Выгружает данные из базы данных в csv-файлы'
+
+    def add_arguments(self, parser: Any) -> None:
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            'output_dir', help='Каталог, в который записываются файлы'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip',
+        )
+        parser.add_argument(
+            '--since',
+            help=(
+                'Выгрузить только строки, измененные после этого момента '
+                '(ISO 8601). Таблицы без даты изменения выгружаются '
+                'целиком, а произведения и связи с жанрами отбираются '
+                'по дате изменения произведения, которую меняют и новые '
+                'отзывы'
+            ),
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Количество строк, которое читается из базы данных за раз',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Вызов и обработка всех команд выгрузки в csv-файлы."""
+        self.output_dir: str = options['output_dir']
+        self.compress: bool = options['gzip']
+        self.chunk_size: int = options['chunk_size']
+        if self.chunk_size < 1:
+            raise CommandError('Размер порции должен быть больше нуля.')
+        self.since: Optional[datetime] = self.parse_since(options['since'])
+        os.makedirs(self.output_dir, exist_ok=True)
+        with transaction.atomic():
+            self.start_snapshot()
+            self.export_users()
+            self.export_categories()
+            self.export_genres()
+            self.export_titles()
+            self.export_reviews()
+            self.export_comments()
+            self.export_genre_title()
+
+    @staticmethod
+    def start_snapshot() -> None:
+        """
+        Переводит транзакцию в режим REPEATABLE READ только для чтения:
+        все запросы выгрузки видят один снимок данных, и строки,
+        измененные во время выгрузки, не нарушают связи между файлами.
+        Должен выполняться первым запросом транзакции.
+        """
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY'
+            )
+
+    @staticmethod
+    def parse_since(value: Optional[str]) -> Optional[datetime]:
+        """Разбирает момент, после которого выгружаются изменения."""
+        if value is None:
+            return None
+        try:
+            since: Optional[datetime] = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise CommandError(
+                'Параметр --since должен быть датой и временем в ISO 8601.'
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def export_data_to_csv(
+        self,
+        file_name: str,
+        queryset: models.QuerySet,
+        columns: dict[str, str],
+        modified_field: Optional[str] = None,
+    ) -> None:
+        """
+        Выгружает строки queryset в csv-файл с заголовком из ключей
+        columns и значениями полей из значений columns.
+        С параметром '--since' строки отбираются по modified_field.
+        Файл сначала пишется во временный и заменяет прежний,
+        только если выгрузка завершилась.
+        """
+        if self.since is not None and modified_field is not None:
+            queryset = queryset.filter(
+                **{f'{modified_field}__gte': self.since}
+            )
+        rows = (
+            queryset
+            .order_by('pk')
+            .values_list(*columns.values())
+            .iterator(chunk_size=self.chunk_size)
+        )
+        if self.compress:
+            file_name = f'{file_name}.gz'
+        path: str = os.path.join(self.output_dir, file_name)
+        descriptor, temporary_path = mkstemp(
+            dir=self.output_dir, prefix=f'.{file_name}.'
+        )
+        os.close(descriptor)
+        try:
+            with self.open_text(temporary_path) as csv_file:
+                writer: csv.writer = csv.writer(csv_file)
+                writer.writerow(columns)
+                count: int = 0
+                for row in rows:
+                    writer.writerow(
+                        value.isoformat()
+                        if isinstance(value, datetime) else value
+                        for value in row
+                    )
+                    count += 1
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        os.replace(temporary_path, path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{queryset.model._meta.verbose_name_plural}: '
+                f'выгружено {count} в {path}'
+            )
+        )
+
+    def open_text(self, path: str) -> IO[str]:
+        """Открывает файл для записи текста, при необходимости сжимая его."""
+        if self.compress:
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def export_categories(self) -> None:
+        """Выгружает категории в файл category.csv."""
+        self.export_data_to_csv(
+            'category.csv',
+            Category.objects.all(),
+            {'id': 'id', 'name': 'name', 'slug': 'slug'},
+        )
+
+    def export_genres(self) -> None:
+        """Выгружает жанры в файл genre.csv."""
+        self.export_data_to_csv(
+            'genre.csv',
+            Genre.objects.all(),
+            {'id': 'id', 'name': 'name', 'slug': 'slug'},
+        )
+
+    def export_titles(self) -> None:
+        """
+        Выгружает произведения в файл titles.csv.
+        Дата изменения отражает и столбцы, которых нет в файле,
+        поэтому с '--since' выгружаются и произведения, у которых
+        изменились только описание, рейтинг или поисковый вектор.
+        """
+        self.export_data_to_csv(
+            'titles.csv',
+            Title.objects.all(),
+            {
+                'id': 'id',
+                'name': 'name',
+                'year': 'year',
+                'category': 'category_id',
+            },
+            'modified_date',
+        )
+
+    def export_reviews(self) -> None:
+        """Выгружает отзывы в файл review.csv."""
+        self.export_data_to_csv(
+            'review.csv',
+            Review.objects.all(),
+            {
+                'id': 'id',
+                'title_id': 'title_id',
+                'text': 'text',
+                'author': 'author_id',
+                'score': 'score',
+                'pub_date': 'pub_date',
+            },
+            'modified_date',
+        )
+
+    def export_comments(self) -> None:
+        """Выгружает комментарии в файл comments.csv."""
+        self.export_data_to_csv(
+            'comments.csv',
+            Comment.objects.all(),
+            {
+                'id': 'id',
+                'review_id': 'review_id',
+                'text': 'text',
+                'author': 'author_id',
+                'pub_date': 'pub_date',
+            },
+            'modified_date',
+        )
+
+    def export_genre_title(self) -> None:
+        """
+        Выгружает связь жанров и произведений в файл genre_title.csv.
+        Изменение жанров меняет дату изменения произведения,
+        поэтому связи отбираются по ней вместе с произведениями;
+        удаленные связи в выгрузку с '--since' не попадают.
+        """
+        self.export_data_to_csv(
+            'genre_title.csv',
+            TitleGenre.objects.all(),
+            {'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id'},
+            'title__modified_date',
+        )
+
+    def export_users(self) -> None:
+        """Выгружает пользователей в файл users.csv."""
+        self.export_data_to_csv(
+            'users.csv',
+            User.objects.all(),
+            {
+                'id': 'id',
+                'username': 'username',
+                'email': 'email',
+                'role': 'role',
+                'bio': 'bio',
+                'first_name': 'first_name',
+                'last_name': 'last_name',
+            },
+        )
@@ -1,66 +1,735 @@
 import csv
-from typing import Any
+from contextlib import contextmanager
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+)
+from hashlib import md5
+from io import StringIO
+from itertools import islice
+from typing import IO, Any, Callable, Iterable, Iterator, Optional
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, Sum
 
-from reviews.models import Category, Title, Genre, TitleGenre, Comment, Review
+from api.caches import bump_cache_version
+from constants import (
+    CATEGORIES_RESOURCE,
+    GENRES_RESOURCE,
+    IMPORT_BATCH_SIZE,
+    IMPORT_FULL_REFRESH_SHARE,
+    IMPORT_FULL_REFRESH_SIZE,
+    TITLES_RESOURCE,
+)
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    ImportedRowDigest,
+    RatingStats,
+    Review,
+    Title,
+    TitleGenre,
+    TitleRanking,
+)
 
 DATA_DIR: str = f'{settings.BASE_DIR}/static/data'
+TABLE_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    'users': (),
+    'categories': (),
+    'genres': (),
+    'titles': ('categories',),
+    'reviews': ('titles', 'users'),
+    'comments': ('reviews', 'users'),
+    'genre_title': ('titles', 'genres'),
+}
+ROW_DIGEST_SEPARATOR: str = '\x1f'
+GROUP_FIELDS: dict[type[models.Model], str] = {
+    Title._meta.get_field(name).related_model: name
+    for name in TitleRanking.objects.group_fields
+}
 User = get_user_model()
 
 
+def get_row_digest(row: list[str]) -> str:
+    """
+    Возвращает хэш строки csv-файла. Режим COPY считает
+    такой же хэш в базе данных: md5(concat_ws(разделитель, ...)).
+    """
+    return md5(ROW_DIGEST_SEPARATOR.join(row).encode()).hexdigest()
+
+
+def get_tracked_field(
+        model_class: type[models.Model]
+) -> Optional[models.Field]:
+    """
+    Возвращает поле, по которому изменение строки связывается
+    с произведениями: id произведения, категории или жанра
+    либо ссылку на произведение. Строки остальных таблиц
+    не влияют на рейтинги и поисковые векторы произведений.
+    """
+    if model_class is Title or model_class in GROUP_FIELDS:
+        return model_class._meta.pk
+    return next(
+        (
+            field for field in model_class._meta.concrete_fields
+            if field.is_relation and field.related_model is Title
+        ),
+        None,
+    )
+
+
+@contextmanager
+def keep_csv_dates(
+        model_class: type[models.Model], field_names: list[str]
+) -> Iterator[None]:
+    """
+    Отключает auto_now_add у полей, значения которых есть в файле.
+    Иначе bulk_create заменяет даты из файла временем импорта,
+    а COPY и обновление в режиме '--upsert' их сохраняют.
+    """
+    fields: list[models.Field] = [
+        field for field in model_class._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+        and field.attname in field_names
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
 class Command(BaseCommand):
-    """Импортирует данные из csv-файлов в базу данных."""
+    """
+    Импортирует данные из csv-файлов в базу данных.
+    Строки читаются пакетами, каждый пакет создается одним INSERT
+    в отдельной транзакции, а в режиме '--copy' файл целиком
+    загружается в PostgreSQL командой COPY. Сигналы при этом не вызываются,
+    поэтому зависящие от загруженных данных рейтинги, поисковые
+    векторы и версии кэша пересчитываются один раз в конце импорта.
+    С параметром '--jobs' таблицы, которые не ссылаются друг на друга,
+    загружаются одновременно, а файлы делятся на части по '--batch-size'
+    строк, которые загружаются параллельно в отдельных соединениях.
+    В режиме '--upsert' существующие строки не пропускаются,
+    а обновляются, если их хэш изменился с прошлой загрузки.
+    Производные данные пересчитываются только для произведений,
+    которых касаются созданные и измененные строки.
+    """
     help: str = 'Импортирует данные из csv-файлов в базу данных'
 
+    def add_arguments(self, parser: Any) -> None:
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Количество строк csv-файла в одном пакете',
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help=(
+                'Загружать файлы командой COPY через временную таблицу '
+                '(только PostgreSQL)'
+            ),
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help=(
+                'Обновлять существующие объекты, строки которых изменились '
+                'с прошлой загрузки в этом режиме'
+            ),
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Количество соединений для параллельной загрузки',
+        )
+
     def handle(self, *args: Any, **options: Any) -> None:
         """Вызов и обработка всех команд импорта из csv-файлов."""
-        self.import_users()
-        self.import_categories()
-        self.import_genres()
-        self.import_titles()
-        self.import_reviews()
-        self.import_comments()
-        self.import_genre_title()
+        self.batch_size: int = options['batch_size']
+        if self.batch_size < 1:
+            raise CommandError('Размер пакета должен быть больше нуля.')
+        self.jobs: int = options['jobs']
+        if self.jobs < 1:
+            raise CommandError(
+                'Количество соединений должно быть больше нуля.'
+            )
+        self.use_copy: bool = options['copy']
+        self.upsert: bool = options['upsert']
+        if self.use_copy and connection.vendor != 'postgresql':
+            self.use_copy = False
+            self.stdout.write(
+                self.style.WARNING(
+                    'COPY поддерживается только в PostgreSQL, '
+                    'данные будут загружены пакетами.'
+                )
+            )
+        self.imported_models: set[type[models.Model]] = set()
+        self.title_ids: set[int] = set()
+        self.group_ids: dict[str, set[int]] = {
+            field_name: set() for field_name in GROUP_FIELDS.values()
+        }
+        try:
+            if self.jobs == 1:
+                for table in TABLE_DEPENDENCIES:
+                    getattr(self, f'import_{table}')()
+            else:
+                with ThreadPoolExecutor(self.jobs) as self.loader:
+                    self.import_tables_in_parallel()
+        finally:
+            # Пакеты фиксируются по отдельности, поэтому после ошибки
+            # производные данные пересчитываются для уже загруженного:
+            # повторный запуск эти строки пропустит.
+            if self.imported_models:
+                self.update_derived_data()
+
+    def import_tables_in_parallel(self) -> None:
+        """
+        Загружает таблицы по графу внешних ключей: таблица начинает
+        загружаться, как только загружены все таблицы, на которые
+        она ссылается. Файлы читаются в отдельных потоках,
+        а части файлов загружаются в потоках self.loader.
+        """
+        pending: dict[str, tuple[str, ...]] = dict(TABLE_DEPENDENCIES)
+        running: dict[Future, str] = {}
+        loaded: set[str] = set()
+        with ThreadPoolExecutor(len(TABLE_DEPENDENCIES)) as readers:
+            while pending or running:
+                for table, dependencies in list(pending.items()):
+                    if loaded.issuperset(dependencies):
+                        del pending[table]
+                        running[
+                            readers.submit(getattr(self, f'import_{table}'))
+                        ] = table
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    loaded.add(running.pop(future))
 
     def import_data_from_csv(
         self,
         file_path: str,
-        model_class: models.Model,
+        model_class: type[models.Model],
         field_names: list[str],
     ) -> None:
         """Импортирует данные из csv-файла в базу данных."""
-        with open(file_path, 'r') as csv_file:
+        with keep_csv_dates(model_class, field_names):
+            self.load_file(file_path, model_class, field_names)
+
+    def load_file(
+        self,
+        file_path: str,
+        model_class: type[models.Model],
+        field_names: list[str],
+    ) -> None:
+        """Загружает файл выбранным способом."""
+        if self.jobs > 1:
+            self.load_parts(file_path, model_class, field_names)
+        elif self.use_copy:
+            with open(file_path, encoding='utf-8', newline='') as csv_file:
+                self.copy_to_table(
+                    model_class, field_names, csv_file, 'COPY', header=True
+                )
+        else:
+            for batch_number, rows in enumerate(
+                self.read_batches(file_path), start=1
+            ):
+                self.load_rows(
+                    model_class, field_names, rows, f'пакет {batch_number}'
+                )
+
+    def read_batches(self, file_path: str) -> Iterator[list[list[str]]]:
+        """Читает строки csv-файла без заголовка пакетами."""
+        with open(file_path, encoding='utf-8', newline='') as csv_file:
             reader: csv.reader = csv.reader(csv_file)
             next(reader)
-            for row in reader:
-                data: dict[str, str] = dict(zip(field_names, row))
-
-                model_exists: bool = model_class.objects.filter(
-                    id=data['id']
-                ).exists()
-
-                if not model_exists:
-                    if 'author' in field_names:
-                        author_id: int = data.pop('author')
-                        author: User = User.objects.get(id=author_id)
-                        data['author'] = author
-
-                    model_class.objects.create(**data)
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Данные успешно импортированы: {data["id"]}'
-                        )
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Данные уже существуют: {data["id"]}'
-                        )
-                    )
+            yield from iter(
+                lambda: list(islice(reader, self.batch_size)), []
+            )
+
+    def load_parts(
+        self,
+        file_path: str,
+        model_class: type[models.Model],
+        field_names: list[str],
+    ) -> None:
+        """
+        Загружает части файла параллельно в потоках self.loader.
+        Одновременно читается не больше частей, чем потоков,
+        поэтому файл не загружается в память целиком.
+        """
+        futures: set[Future] = set()
+        for batch_number, rows in enumerate(
+            self.read_batches(file_path), start=1
+        ):
+            if len(futures) >= self.jobs:
+                finished, futures = wait(
+                    futures, return_when=FIRST_COMPLETED
+                )
+                for future in finished:
+                    future.result()
+            futures.add(self.loader.submit(
+                self.load_part,
+                model_class, field_names, rows, f'часть {batch_number}',
+            ))
+        for future in futures:
+            future.result()
+
+    def load_part(
+        self,
+        model_class: type[models.Model],
+        field_names: list[str],
+        rows: list[list[str]],
+        stage: str,
+    ) -> None:
+        """Загружает часть файла и закрывает соединение потока."""
+        try:
+            if not self.use_copy:
+                self.load_rows(model_class, field_names, rows, stage)
+                return
+            part: StringIO = StringIO()
+            csv.writer(part).writerows(rows)
+            part.seek(0)
+            self.copy_to_table(
+                model_class, field_names, part, stage, header=False
+            )
+        finally:
+            connection.close()
+
+    def load_rows(
+        self,
+        model_class: type[models.Model],
+        field_names: list[str],
+        batch: list[list[str]],
+        stage: str,
+    ) -> None:
+        """Загружает пакет строк через ORM."""
+        if self.upsert:
+            self.upsert_rows(model_class, field_names, batch, stage)
+        else:
+            self.bulk_create_rows(model_class, field_names, batch, stage)
+
+    def bulk_create_rows(
+        self,
+        model_class: type[models.Model],
+        field_names: list[str],
+        batch: list[list[str]],
+        stage: str,
+    ) -> None:
+        """
+        Создает объекты пакета строк одним INSERT.
+        Существующие id пакета выбираются одним запросом.
+        """
+        rows: list[dict[str, str]] = [
+            dict(zip(field_names, row)) for row in batch
+        ]
+        with transaction.atomic():
+            existing_ids: set[str] = {
+                str(pk) for pk in model_class.objects.filter(
+                    pk__in=[row['id'] for row in rows]
+                ).values_list('pk', flat=True)
+            }
+            created: list[models.Model] = model_class.objects.bulk_create(
+                model_class(**row) for row in rows
+                if row['id'] not in existing_ids
+            )
+        self.track_changes(model_class, created)
+        self.report(model_class, stage, len(created), len(rows))
+
+    def upsert_rows(
+        self,
+        model_class: type[models.Model],
+        field_names: list[str],
+        batch: list[list[str]],
+        stage: str,
+    ) -> None:
+        """
+        Создает новые и обновляет измененные объекты пакета строк.
+        Строка считается измененной, если ее хэш не совпадает
+        с сохраненным при прошлой загрузке, остальные строки
+        не записываются. Для обновленных строк запоминаются
+        и прежние ссылки на произведения.
+        """
+        table: str = model_class._meta.db_table
+        tracked_field: Optional[models.Field] = get_tracked_field(model_class)
+        digests: dict[int, str] = {
+            int(row[0]): get_row_digest(row) for row in batch
+        }
+        with transaction.atomic():
+            stored: dict[int, str] = dict(
+                ImportedRowDigest.objects
+                .filter(table=table, row_id__in=digests)
+                .values_list('row_id', 'digest')
+            )
+            changed: dict[int, models.Model] = {
+                int(row[0]): model_class(**dict(zip(field_names, row)))
+                for row in batch
+                if stored.get(int(row[0])) != digests[int(row[0])]
+            }
+            previous: dict[int, Any] = dict(
+                model_class.objects
+                .filter(pk__in=changed)
+                .values_list(
+                    'pk', tracked_field.attname if tracked_field else 'pk'
+                )
+            )
+            existing_ids: set[int] = set(previous)
+            auto_now_fields: list[models.Field] = [
+                field for field in model_class._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            ]
+            self.track_ids(model_class, previous.values())
+            self.track_changes(model_class, changed.values())
+            updated: list[models.Model] = []
+            for row_id in existing_ids:
+                instance: models.Model = changed.pop(row_id)
+                for field in auto_now_fields:
+                    field.pre_save(instance, add=False)
+                updated.append(instance)
+            model_class.objects.bulk_create(changed.values())
+            model_class.objects.bulk_update(updated, [
+                name for name in field_names if name != 'id'
+            ] + [field.name for field in auto_now_fields])
+            ImportedRowDigest.objects.filter(
+                table=table, row_id__in=[*changed, *existing_ids]
+            ).delete()
+            ImportedRowDigest.objects.bulk_create(
+                ImportedRowDigest(
+                    table=table, row_id=row_id, digest=digests[row_id]
+                )
+                for row_id in [*changed, *existing_ids]
+            )
+        self.report(
+            model_class, stage, len(changed), len(batch), len(updated)
+        )
+
+    def copy_to_table(
+        self,
+        model_class: type[models.Model],
+        field_names: list[str],
+        csv_file: IO[str],
+        stage: str,
+        header: bool,
+    ) -> None:
+        """
+        Загружает данные в формате csv командой COPY во временную
+        таблицу с текстовыми столбцами и переносит их в таблицу модели
+        одним INSERT ... SELECT с ON CONFLICT DO NOTHING.
+        Столбцы, которых нет в файле, заполняются значениями
+        по умолчанию полей модели. Ссылки созданных строк
+        на произведения возвращаются тем же запросом.
+        """
+        quote_name: Callable[[str], str] = connection.ops.quote_name
+        fields: dict[str, models.Field] = {
+            field.attname: field
+            for field in model_class._meta.concrete_fields
+        }
+        other_fields: list[models.Field] = [
+            field for name, field in fields.items()
+            if name not in field_names
+        ]
+        instance: models.Model = model_class()
+        staging_table: str = quote_name(f'{model_class._meta.db_table}_csv')
+        csv_columns: str = ', '.join(map(quote_name, field_names))
+        columns: str = ', '.join(
+            quote_name(field.column)
+            for field in [fields[name] for name in field_names] + other_fields
+        )
+        values: str = ', '.join(
+            [
+                (
+                    f"NULLIF({quote_name(name)}, '')" if fields[name].null
+                    else quote_name(name)
+                ) + f'::{fields[name].cast_db_type(connection)}'
+                for name in field_names
+            ] + [
+                f'%s::{field.cast_db_type(connection)}'
+                for field in other_fields
+            ]
+        )
+        params: list[Any] = [
+            field.get_db_prep_save(
+                field.pre_save(instance, add=True), connection
+            )
+            for field in other_fields
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {staging_table} ('
+                + ', '.join(f'{quote_name(name)} text' for name in field_names)
+                + ') ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                f'COPY {staging_table} ({csv_columns}) FROM STDIN WITH '
+                f'(FORMAT csv, HEADER {str(header).lower()}, '
+                f'FORCE_NOT_NULL ({csv_columns}))',
+                csv_file,
+            )
+            cursor.execute(f'SELECT count(*) FROM {staging_table}')
+            rows_count: int = cursor.fetchone()[0]
+            if self.upsert:
+                created_count, updated_count, title_ids = self.copy_upsert(
+                    cursor, model_class, field_names, staging_table,
+                    columns, values, params,
+                )
+                self.track_ids(model_class, title_ids or ())
+                self.report(
+                    model_class, stage, created_count, rows_count,
+                    updated_count,
+                )
+                return
+            tracked_field: Optional[models.Field] = (
+                get_tracked_field(model_class)
+            )
+            returning: str = (
+                f' RETURNING {quote_name(tracked_field.column)}'
+                if tracked_field else ''
+            )
+            cursor.execute(
+                f'INSERT INTO {quote_name(model_class._meta.db_table)} '
+                f'({columns}) SELECT {values} FROM {staging_table} '
+                f'ON CONFLICT DO NOTHING{returning}',
+                params,
+            )
+            created_count: int = cursor.rowcount
+            if tracked_field:
+                self.track_ids(
+                    model_class, (row[0] for row in cursor.fetchall())
+                )
+        self.report(model_class, stage, created_count, rows_count)
+
+    def copy_upsert(
+        self,
+        cursor: Any,
+        model_class: type[models.Model],
+        field_names: list[str],
+        staging_table: str,
+        columns: str,
+        values: str,
+        params: list[Any],
+    ) -> tuple[int, int, Optional[list[int]]]:
+        """
+        Переносит из временной таблицы строки, хэш которых
+        не совпадает с сохраненным, через INSERT ... ON CONFLICT
+        DO UPDATE и сохраняет их новые хэши одним запросом.
+        Обновляются только столбцы из файла и поля с auto_now.
+        Возвращает количество созданных и обновленных объектов
+        и новые и прежние ссылки записанных строк на произведения.
+        """
+        quote_name: Callable[[str], str] = connection.ops.quote_name
+        opts = model_class._meta
+        digest_opts = ImportedRowDigest._meta
+        digest_table: str = quote_name(digest_opts.db_table)
+        table_column, row_id_column, digest_column = (
+            quote_name(digest_opts.get_field(name).column)
+            for name in ('table', 'row_id', 'digest')
+        )
+        update_columns: list[str] = [
+            quote_name(opts.get_field(name).column)
+            for name in field_names if name != opts.pk.attname
+        ] + [
+            quote_name(field.column) for field in opts.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+        row_id: str = f'{quote_name(opts.pk.attname)}::bigint'
+        tracked_field: Optional[models.Field] = get_tracked_field(model_class)
+        tracked: str = (
+            quote_name(tracked_field.column) if tracked_field else 'NULL'
+        )
+        set_columns: str = ', '.join(
+            f'{column} = EXCLUDED.{column}' for column in update_columns
+        )
+        cursor.execute(
+            f"""
+            WITH hashed AS (
+                SELECT *, md5(concat_ws(
+                    %s, {', '.join(map(quote_name, field_names))}
+                )) AS row_digest
+                FROM {staging_table}
+            ), changed AS (
+                SELECT hashed.* FROM hashed
+                LEFT JOIN {digest_table} stored
+                    ON stored.{table_column} = %s
+                    AND stored.{row_id_column} = hashed.{row_id}
+                WHERE stored.{digest_column} IS DISTINCT FROM row_digest
+            ), written AS (
+                INSERT INTO {quote_name(opts.db_table)} ({columns})
+                SELECT {values} FROM changed
+                ON CONFLICT ({quote_name(opts.pk.column)})
+                DO UPDATE SET {set_columns}
+                RETURNING xmax = 0 AS created, {tracked} AS tracked
+            ), previous AS (
+                SELECT {tracked} AS tracked
+                FROM {quote_name(opts.db_table)}
+                WHERE {quote_name(opts.pk.column)} IN (
+                    SELECT {row_id} FROM changed
+                )
+            ), digests AS (
+                INSERT INTO {digest_table}
+                    ({table_column}, {row_id_column}, {digest_column})
+                SELECT %s, {row_id}, row_digest FROM changed
+                ON CONFLICT ({table_column}, {row_id_column})
+                DO UPDATE SET {digest_column} = EXCLUDED.{digest_column}
+            )
+            SELECT
+                count(*) FILTER (WHERE created),
+                count(*) FILTER (WHERE NOT created),
+                (
+                    SELECT array_agg(DISTINCT tracked) FROM (
+                        SELECT tracked FROM written
+                        UNION ALL SELECT tracked FROM previous
+                    ) AS titles
+                    WHERE tracked IS NOT NULL
+                )
+            FROM written
+            """,
+            [ROW_DIGEST_SEPARATOR, opts.db_table, *params, opts.db_table],
+        )
+        return cursor.fetchone()
+
+    def track_changes(
+        self,
+        model_class: type[models.Model],
+        instances: Iterable[models.Model],
+    ) -> None:
+        """Запоминает произведения, которых касаются записанные объекты."""
+        tracked_field: Optional[models.Field] = get_tracked_field(model_class)
+        if tracked_field is not None:
+            self.track_ids(model_class, (
+                getattr(instance, tracked_field.attname)
+                for instance in instances
+            ))
+
+    def track_ids(
+        self, model_class: type[models.Model], values: Iterable[Any]
+    ) -> None:
+        """
+        Запоминает id произведений, а для категорий и жанров -
+        id групп, произведения которых нужно пересчитать.
+        """
+        if get_tracked_field(model_class) is None:
+            return
+        ids: set[int] = {int(value) for value in values if value}
+        if model_class in GROUP_FIELDS:
+            self.group_ids[GROUP_FIELDS[model_class]].update(ids)
+        else:
+            self.title_ids.update(ids)
+
+    def report(
+        self,
+        model_class: type[models.Model],
+        stage: str,
+        created_count: int,
+        rows_count: int,
+        updated_count: Optional[int] = None,
+    ) -> None:
+        """
+        Выводит результат загрузки части файла и запоминает модели,
+        в которых были созданы или изменены объекты.
+        """
+        if created_count or updated_count:
+            self.imported_models.add(model_class)
+        if updated_count is None:
+            result: str = f'уже существуют {rows_count - created_count}'
+        else:
+            result = (
+                f'обновлено {updated_count}, без изменений '
+                f'{rows_count - created_count - updated_count}'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{model_class._meta.verbose_name_plural}, {stage}: '
+                f'импортировано {created_count}, {result}'
+            )
+        )
+
+    def update_derived_data(self) -> None:
+        """
+        Пересчитывает данные, которые при создании объектов по одному
+        обновляют сигналы, для затронутых импортом произведений.
+        Сдвигает последовательности id за загруженные id
+        и меняет версии кэша API измененных ресурсов.
+        """
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), self.imported_models
+            ):
+                cursor.execute(sql)
+        title_ids: set[int] = set(self.title_ids)
+        for field_name, group_ids in self.group_ids.items():
+            if group_ids:
+                title_ids.update(
+                    Title.objects
+                    .filter(**{f'{field_name}__in': group_ids})
+                    .values_list('pk', flat=True)
+                )
+        resources: list[str] = [
+            resource for model_class, resource in (
+                (Category, CATEGORIES_RESOURCE),
+                (Genre, GENRES_RESOURCE),
+            )
+            if model_class in self.imported_models
+        ]
+        if title_ids:
+            self.update_titles(title_ids)
+            resources.append(TITLES_RESOURCE)
+        if resources:
+            bump_cache_version(*resources)
+
+    def update_titles(self, title_ids: set[int]) -> None:
+        """
+        Пересчитывает рейтинги и поисковые векторы произведений
+        и рейтинги лучших произведений их групп. Общая статистика
+        оценок пересчитывается, только если изменились отзывы,
+        а взвешенный рейтинг всех произведений - только если
+        заметно сдвинулась средняя оценка. Дата изменения
+        произведения меняется, только если изменились его данные.
+        Если затронута большая часть произведений, вместо списка id
+        пересчитывается вся таблица, а рейтинги групп перестраиваются
+        целиком.
+        """
+        full_refresh: bool = len(title_ids) > min(
+            IMPORT_FULL_REFRESH_SIZE,
+            Title.objects.count() * IMPORT_FULL_REFRESH_SHARE,
+        )
+        titles: models.QuerySet = (
+            Title.objects.all() if full_refresh
+            else Title.objects.filter(pk__in=title_ids)
+        )
+        with transaction.atomic():
+            rated_count: int = titles.update_rating()
+            if Review in self.imported_models:
+                totals: dict[str, int] = Review.objects.aggregate(
+                    score_sum=Sum('score'), score_count=Count('pk')
+                )
+                stats, mean_changed = RatingStats.objects.set_scores(
+                    totals['score_sum'] or 0, totals['score_count']
+                )
+                (
+                    Title.objects if mean_changed else titles
+                ).update_weighted_rating(stats.mean)
+            indexed_count: int = titles.update_search_vector()
+        if full_refresh:
+            TitleRanking.objects.rebuild()
+        else:
+            TitleRanking.objects.refresh_titles(title_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Рейтинги и поисковые векторы пересчитаны: '
+                f'произведений {len(title_ids)}, изменены рейтинги '
+                f'{rated_count}, поисковые векторы {indexed_count}'
+            )
+        )
 
     def import_categories(self) -> None:
         """Импортирует категории из файла category.csv."""
@@ -87,7 +756,7 @@ class Command(BaseCommand):
             'id',
             'title_id',
             'text',
-            'author',
+            'author_id',
             'score',
             'pub_date',
         ]
@@ -100,7 +769,7 @@ class Command(BaseCommand):
             'id',
             'review_id',
             'text',
-            'author',
+            'author_id',
             'pub_date',
         ]
         self.import_data_from_csv(file_path, Comment, field_names)
@@ -0,0 +1,19 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from reviews.models import TitleRanking
+
+
+class Command(BaseCommand):
+    """Полностью перестраивает рейтинги произведений."""
+    help: str = (
+        'Перестраивает рейтинги лучших произведений по категориям и жанрам'
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Перестраивает рейтинги и выводит количество мест."""
+        count: int = TitleRanking.objects.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рейтинги перестроены, мест: {count}')
+        )
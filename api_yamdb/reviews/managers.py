@@ -0,0 +1,454 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from typing import Any, Iterable, Optional
+
+from django.db import connections, models, transaction
+from django.db.models import (
+    Avg, CharField, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value,
+    Window
+)
+from django.db.models.expressions import Combinable
+from django.db.models.functions import Cast, Coalesce, Now, RowNumber
+
+from constants import (
+    LEADERBOARD_SIZE,
+    SEARCH_CONFIG,
+    WEIGHTED_RATING_MEAN_TOLERANCE,
+    WEIGHTED_RATING_MIN_VOTES,
+)
+
+
+def get_weighted_rating(
+        rating: Combinable, rating_count: Combinable, mean: Optional[float]
+) -> Combinable:
+    """
+    Возвращает выражение взвешенного (байесовского) рейтинга
+    R * v / (v + m) + C * m / (v + m), где R - средняя оценка
+    произведения, v - количество его оценок, C - средняя оценка
+    всех отзывов, m - WEIGHTED_RATING_MIN_VOTES.
+    У произведения без оценок R не определен, как и сам рейтинг.
+    """
+    if mean is None:
+        return Value(None, output_field=FloatField())
+    return (
+        rating * rating_count
+        + Value(mean * WEIGHTED_RATING_MIN_VOTES, output_field=FloatField())
+    ) / (rating_count + WEIGHTED_RATING_MIN_VOTES)
+
+
+class TitleQuerySet(models.QuerySet):
+    """Кастомный QuerySet для модели произведений."""
+    facet_fields: tuple[str, ...] = ('genre', 'category', 'year')
+
+    def update_search_vector(self) -> int:
+        """
+        Пересчитывает поисковый вектор произведений по названию,
+        описанию, названиям жанров и категории одним UPDATE-запросом.
+        Вектор зависит от тех же данных, что и ответ API, поэтому
+        вместе с ним обновляется дата изменения произведения.
+        Записываются только произведения, вектор которых изменился.
+        """
+        genre_names: Subquery = Subquery(
+            self.model.genre.through.objects
+            .filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title')
+            .annotate(names=StringAgg('genre__name', ' '))
+            .values('names')
+        )
+        category_name: Subquery = Subquery(
+            self.model.category.field.related_model.objects
+            .filter(pk=OuterRef('category_id'))
+            .values('name')
+        )
+        search_vector: Combinable = (
+            SearchVector('name', config=SEARCH_CONFIG, weight='A')
+            + SearchVector(
+                genre_names, category_name,
+                config=SEARCH_CONFIG, weight='B',
+            )
+            + SearchVector('description', config=SEARCH_CONFIG, weight='C')
+        )
+        return self.filter(search_vector__distinct_from=search_vector).update(
+            search_vector=search_vector,
+            modified_date=Now(),
+        )
+
+    def facet_counts(
+            self, facets: Iterable[str]
+    ) -> dict[str, list[dict[str, Any]]]:
+        """
+        Считает произведения выборки по жанрам, категориям
+        и десятилетиям выхода. Группировки всех фасетов объединяются
+        через UNION ALL и выполняются одним запросом.
+        """
+        title_ids: models.QuerySet = self.order_by().values('pk')
+        titles: models.QuerySet = self.model.objects.filter(pk__in=title_ids)
+        facet_queries: dict[str, models.QuerySet] = {
+            'genre': (
+                self.model.genre.through.objects
+                .filter(title__in=title_ids, genre__isnull=False)
+                .values(value=F('genre__slug'))
+                .annotate(count=Count('title', distinct=True))
+            ),
+            'category': (
+                titles
+                .filter(category__isnull=False)
+                .values(value=F('category__slug'))
+                .annotate(count=Count('pk'))
+            ),
+            'year': (
+                titles
+                .values(value=Cast(F('year') / 10 * 10, CharField()))
+                .annotate(count=Count('pk'))
+            ),
+        }
+        queries: list[models.QuerySet] = [
+            facet_queries[facet]
+            .annotate(facet=Value(facet, output_field=CharField()))
+            .values_list('facet', 'value', 'count')
+            for facet in facets
+        ]
+        counts: dict[str, list[dict[str, Any]]] = {
+            facet: [] for facet in facets
+        }
+        if not queries:
+            return counts
+        for facet, value, count in queries[0].union(*queries[1:], all=True):
+            counts[facet].append({
+                'value': int(value) if facet == 'year' else value,
+                'count': count,
+            })
+        for facet_counts in counts.values():
+            facet_counts.sort(key=lambda item: (-item['count'], item['value']))
+        return counts
+
+    def update_rating(self) -> int:
+        """
+        Пересчитывает сумму и количество оценок и средний рейтинг
+        произведений по их отзывам одним UPDATE-запросом.
+        Нужен после загрузки отзывов в обход сигналов.
+        Средний рейтинг определяется суммой и количеством, поэтому
+        записываются только произведения, у которых они изменились.
+        """
+        reviews: models.QuerySet = (
+            self.model.reviews.rel.related_model.objects
+            .filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title')
+        )
+        rating_sum: Combinable = Coalesce(Subquery(
+            reviews.annotate(total=Sum('score')).values('total')
+        ), 0)
+        rating_count: Combinable = Coalesce(Subquery(
+            reviews.annotate(total=Count('pk')).values('total')
+        ), 0)
+        return self.filter(
+            Q(rating_sum__distinct_from=rating_sum)
+            | Q(rating_count__distinct_from=rating_count)
+        ).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=Subquery(
+                reviews.annotate(
+                    total=Avg('score', output_field=FloatField())
+                ).values('total')
+            ),
+            modified_date=Now(),
+        )
+
+    def update_weighted_rating(self, mean: Optional[float]) -> int:
+        """
+        Пересчитывает взвешенный рейтинг произведений с оценками
+        по средней оценке всех отзывов одним UPDATE-запросом.
+        Записываются только произведения, рейтинг которых изменился.
+        """
+        weighted_rating: Combinable = get_weighted_rating(
+            F('rating'), F('rating_count'), mean
+        )
+        return self.filter(
+            rating__isnull=False,
+            weighted_rating__distinct_from=weighted_rating,
+        ).update(
+            weighted_rating=weighted_rating,
+            modified_date=Now(),
+        )
+
+
+class RatingStatsManager(models.Manager):
+    """Менеджер общей статистики оценок."""
+
+    def add_scores(
+            self, score_delta: int, count_delta: int
+    ) -> tuple[models.Model, bool]:
+        """
+        Изменяет общую сумму и количество оценок под блокировкой строки
+        до конца транзакции. Средняя оценка взвешенного рейтинга
+        обновляется, только если текущая средняя ушла от нее дальше,
+        чем на WEIGHTED_RATING_MEAN_TOLERANCE. Возвращает статистику
+        и признак того, что средняя оценка изменилась.
+        """
+        stats, _ = self.select_for_update().get_or_create(pk=1)
+        return self.save_scores(
+            stats,
+            stats.score_sum + score_delta,
+            stats.score_count + count_delta,
+        )
+
+    def set_scores(
+            self, score_sum: int, score_count: int
+    ) -> tuple[models.Model, bool]:
+        """
+        Задает общую сумму и количество оценок под блокировкой строки
+        до конца транзакции. Средняя оценка взвешенного рейтинга
+        обновляется так же, как в add_scores.
+        """
+        stats, _ = self.select_for_update().get_or_create(pk=1)
+        return self.save_scores(stats, score_sum, score_count)
+
+    @staticmethod
+    def save_scores(
+            stats: models.Model, score_sum: int, score_count: int
+    ) -> tuple[models.Model, bool]:
+        """
+        Сохраняет сумму и количество оценок и переносит текущую
+        среднюю оценку в среднюю оценку взвешенного рейтинга,
+        если она ушла от нее дальше, чем на
+        WEIGHTED_RATING_MEAN_TOLERANCE.
+        """
+        stats.score_sum = score_sum
+        stats.score_count = score_count
+        mean: Optional[float] = stats.get_current_mean()
+        if mean is None or stats.mean is None:
+            mean_changed: bool = mean != stats.mean
+        else:
+            mean_changed = (
+                abs(mean - stats.mean) > WEIGHTED_RATING_MEAN_TOLERANCE
+            )
+        if mean_changed:
+            stats.mean = mean
+        stats.save()
+        return stats, mean_changed
+
+
+class TitleRankingManager(models.Manager):
+    """
+    Менеджер рейтингов лучших произведений по категориям и жанрам.
+    Порядок в рейтинге совпадает с сортировкой 'ordering=-rating'.
+    """
+    group_fields: tuple[str, ...] = ('category', 'genre')
+
+    def get_title_model(self) -> type[models.Model]:
+        """Возвращает модель произведения."""
+        return self.model.title.field.related_model
+
+    def lock_group(self, field_name: str, group_id: int) -> bool:
+        """
+        Блокирует строку группы до конца транзакции, чтобы обновления
+        ее рейтинга не пересекались. Блокировка FOR NO KEY UPDATE
+        не мешает вставке произведений и связей, ссылающихся
+        на группу. Возвращает False, если группы уже нет.
+        """
+        group_model: type[models.Model] = (
+            self.model._meta.get_field(field_name).related_model
+        )
+        return (
+            group_model.objects
+            .select_for_update(no_key=True)
+            .filter(pk=group_id)
+            .exists()
+        )
+
+    def refresh(
+            self, categories: Iterable[int] = (), genres: Iterable[int] = ()
+    ) -> None:
+        """Перестраивает рейтинги заданных категорий и жанров."""
+        for field_name, group_ids in zip(
+            self.group_fields, (categories, genres)
+        ):
+            for group_id in set(group_ids):
+                self.refresh_group(field_name, group_id)
+
+    def refresh_titles(self, title_ids: Iterable[int]) -> None:
+        """
+        Обновляет места произведений в рейтингах групп, в которые
+        они входят сейчас, и групп, в рейтингах которых они уже
+        занимают места. Группа записывается, только если
+        произведение входит в рейтинг, выходит из него
+        или меняет в нем место.
+        """
+        title_ids = list(title_ids)
+        title_model: type[models.Model] = self.get_title_model()
+        groups: set[tuple[str, int]] = {
+            ('category', category_id)
+            for category_id in title_model.objects
+            .filter(
+                pk__in=title_ids,
+                rating__isnull=False,
+                category__isnull=False,
+            )
+            .values_list('category_id', flat=True)
+        }
+        groups.update(
+            ('genre', genre_id)
+            for genre_id in title_model.genre.through.objects
+            .filter(
+                title_id__in=title_ids,
+                title__rating__isnull=False,
+                genre__isnull=False,
+            )
+            .values_list('genre_id', flat=True)
+        )
+        for category_id, genre_id in self.filter(
+            title_id__in=title_ids
+        ).values_list('category_id', 'genre_id'):
+            groups.add(
+                ('category', category_id) if category_id is not None
+                else ('genre', genre_id)
+            )
+        for field_name, group_id in groups:
+            self.update_group(field_name, group_id, title_ids)
+
+    def update_group(
+            self, field_name: str, group_id: int, title_ids: list[int]
+    ) -> None:
+        """
+        Обновляет рейтинг группы после изменения произведений title_ids
+        по текущим местам и рейтингам: остальные произведения группы
+        рейтинг не меняли, поэтому их порядок сохраняется. Если места
+        освободились в заполненном рейтинге или измененное
+        произведение опустилось ниже последнего неизмененного,
+        на место могут претендовать произведения вне рейтинга,
+        и группа перестраивается полностью.
+        """
+        with transaction.atomic():
+            if not self.lock_group(field_name, group_id):
+                return
+            entries: list[tuple[int, float]] = list(
+                self.filter(**{field_name: group_id})
+                .order_by('position')
+                .values_list('title_id', 'title__rating')
+            )
+            changed: set[int] = set(title_ids)
+            kept: list[tuple[int, float]] = [
+                entry for entry in entries if entry[0] not in changed
+            ]
+            if not self.is_ordered(kept):
+                self.refresh_group(field_name, group_id)
+                return
+            rows: list[tuple[int, float]] = sorted(
+                kept + list(
+                    self.get_title_model().objects
+                    .filter(
+                        pk__in=title_ids,
+                        rating__isnull=False,
+                        **{field_name: group_id},
+                    )
+                    .values_list('pk', 'rating')
+                ),
+                key=self.get_sort_key,
+            )
+            top: list[tuple[int, float]] = rows[:LEADERBOARD_SIZE]
+            if len(entries) >= LEADERBOARD_SIZE and (
+                len(top) < LEADERBOARD_SIZE
+                or not kept
+                or self.get_sort_key(top[-1]) > self.get_sort_key(kept[-1])
+            ):
+                self.refresh_group(field_name, group_id)
+                return
+            title_ids_in_order: list[int] = [title_id for title_id, _ in top]
+            if title_ids_in_order == [title_id for title_id, _ in entries]:
+                return
+            self.write_group(field_name, group_id, title_ids_in_order)
+
+    @classmethod
+    def is_ordered(cls, entries: list[tuple[int, Optional[float]]]) -> bool:
+        """
+        Проверяет, что рейтинги мест заданы и идут по порядку.
+        Если несколько произведений группы изменились в одной
+        транзакции, места остальных могут отстать от их рейтингов.
+        """
+        if any(rating is None for _, rating in entries):
+            return False
+        keys: list[tuple[float, int]] = list(map(cls.get_sort_key, entries))
+        return keys == sorted(keys)
+
+    @staticmethod
+    def get_sort_key(entry: tuple[int, float]) -> tuple[float, int]:
+        """Возвращает ключ сортировки места: (-рейтинг, id)."""
+        title_id, rating = entry
+        return -rating, title_id
+
+    def write_group(
+            self, field_name: str, group_id: int, title_ids: list[int]
+    ) -> None:
+        """Заменяет места в рейтинге группы на места title_ids."""
+        self.filter(**{field_name: group_id}).delete()
+        self.bulk_create(
+            self.model(
+                **{f'{field_name}_id': group_id},
+                title_id=title_id,
+                position=position,
+            )
+            for position, title_id in enumerate(title_ids, start=1)
+        )
+
+    def refresh_group(self, field_name: str, group_id: int) -> None:
+        """
+        Перестраивает рейтинг одной группы по индексу
+        (группа, рейтинг, id). Строка группы блокируется на время
+        транзакции, поэтому параллельные обновления не пересекаются.
+        """
+        with transaction.atomic():
+            if not self.lock_group(field_name, group_id):
+                return
+            self.write_group(field_name, group_id, list(
+                self.get_title_model().objects
+                .filter(**{field_name: group_id}, rating__isnull=False)
+                .order_by('-rating', 'id')
+                .values_list('pk', flat=True)[:LEADERBOARD_SIZE]
+            ))
+
+    def rebuild(self) -> int:
+        """
+        Полностью перестраивает рейтинги всех категорий и жанров.
+        Места считаются оконной функцией, а строки с местами
+        не ниже LEADERBOARD_SIZE переносятся в таблицу рейтингов
+        одним INSERT ... SELECT на вид группы.
+        Возвращает количество созданных строк.
+        """
+        quote_name = connections[self.db].ops.quote_name
+        opts = self.model._meta
+        count: int = 0
+        with transaction.atomic(using=self.db), (
+            connections[self.db].cursor()
+        ) as cursor:
+            self.all().delete()
+            for field_name in self.group_fields:
+                sql, params = (
+                    self.get_title_model().objects
+                    .filter(
+                        **{f'{field_name}__isnull': False},
+                        rating__isnull=False,
+                    )
+                    .annotate(position=Window(
+                        RowNumber(),
+                        partition_by=F(field_name),
+                        order_by=(F('rating').desc(), F('id').asc()),
+                    ))
+                    .values_list(field_name, 'pk', 'position')
+                    .query.sql_with_params()
+                )
+                columns: str = ', '.join(
+                    quote_name(opts.get_field(name).column)
+                    for name in (field_name, 'title', 'position')
+                )
+                cursor.execute(
+                    f'INSERT INTO {quote_name(opts.db_table)} ({columns}) '
+                    f'SELECT * FROM ({sql}) AS ranked '
+                    '(group_id, title_id, position) '
+                    'WHERE position <= %s',
+                    [*params, LEADERBOARD_SIZE],
+                )
+                count += cursor.rowcount
+        return count
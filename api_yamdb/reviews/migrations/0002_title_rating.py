@@ -0,0 +1,55 @@
+# Generated by Django 3.2 on 2026-10-18 04:36
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = (
+        Review.objects
+        .filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    Title.objects.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0,
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0,
+        ),
+    )
+    Title.objects.filter(rating_count__gt=0).update(
+        rating=Cast('rating_sum', FloatField()) / Cast('rating_count', FloatField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
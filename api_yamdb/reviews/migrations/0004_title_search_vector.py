@@ -0,0 +1,54 @@
+# Generated by Django 3.2 on 2026-10-18 04:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_search_vector(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleGenre = apps.get_model('reviews', 'TitleGenre')
+    Category = apps.get_model('reviews', 'Category')
+    genre_names = Subquery(
+        TitleGenre.objects
+        .filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+        .annotate(names=StringAgg('genre__name', ' '))
+        .values('names')
+    )
+    category_name = Subquery(
+        Category.objects.filter(pk=OuterRef('category_id')).values('name')
+    )
+    Title.objects.update(
+        search_vector=(
+            SearchVector('name', config='russian', weight='A')
+            + SearchVector(
+                genre_names, category_name, config='russian', weight='B'
+            )
+            + SearchVector('description', config='russian', weight='C')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_year_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='title_search_vector_idx'),
+        ),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
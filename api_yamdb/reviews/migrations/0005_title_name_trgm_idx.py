@@ -0,0 +1,20 @@
+# Generated by Django 3.2 on 2026-10-18 04:41
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='title',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='title_name_trgm_idx', opclasses=('gin_trgm_ops',)),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 04:44
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_modified_date(apps, schema_editor):
+    for model_name in ('Review', 'Comment'):
+        model = apps.get_model('reviews', model_name)
+        model.objects.update(modified_date=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_name_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='modified_date',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='modified_date',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='modified_date',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_modified_date, migrations.RunPython.noop),
+    ]
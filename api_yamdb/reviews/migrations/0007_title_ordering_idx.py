@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 04:52
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_modified_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating', 'id'], name='title_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('rating'), descending=True, nulls_last=True), django.db.models.expressions.F('id'), name='title_rating_desc_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+        ),
+    ]
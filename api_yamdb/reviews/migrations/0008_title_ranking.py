@@ -0,0 +1,99 @@
+# Generated by Django 3.2 on 2026-10-18 04:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+# Размер рейтинга на момент миграции: она не зависит
+# от текущего значения LEADERBOARD_SIZE.
+LEADERBOARD_SIZE = 20
+
+BUILD_RANKINGS_SQL = '''
+    INSERT INTO reviews_titleranking ({group}_id, title_id, position)
+    SELECT group_id, title_id, position FROM (
+        SELECT
+            {group_source} AS group_id,
+            t.id AS title_id,
+            ROW_NUMBER() OVER (
+                PARTITION BY {group_source} ORDER BY t.rating DESC, t.id
+            ) AS position
+        FROM reviews_title t {join}
+        WHERE {group_source} IS NOT NULL AND t.rating IS NOT NULL
+    ) AS ranked
+    WHERE position <= %s
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_ordering_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Место')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Рейтинги',
+                'default_related_name': 'rankings',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.expressions.F('category'), django.db.models.expressions.OrderBy(django.db.models.expressions.F('rating'), descending=True, nulls_last=True), django.db.models.expressions.F('id'), name='title_category_rating_idx'),
+        ),
+        migrations.AddField(
+            model_name='titleranking',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.category', verbose_name='Категория'),
+        ),
+        migrations.AddField(
+            model_name='titleranking',
+            name='genre',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.genre', verbose_name='Жанр'),
+        ),
+        migrations.AddField(
+            model_name='titleranking',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('category', 'position'), name='unique_category_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('genre', 'position'), name='unique_genre_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('category__isnull', False), ('genre__isnull', True)), models.Q(('category__isnull', True), ('genre__isnull', False)), _connector='OR'), name='ranking_category_or_genre'),
+        ),
+        migrations.RunSQL(
+            [
+                (
+                    BUILD_RANKINGS_SQL.format(
+                        group='category', group_source='t.category_id',
+                        join='',
+                    ),
+                    [LEADERBOARD_SIZE],
+                ),
+                (
+                    BUILD_RANKINGS_SQL.format(
+                        group='genre', group_source='tg.genre_id',
+                        join=(
+                            'JOIN reviews_titlegenre tg '
+                            'ON tg.title_id = t.id'
+                        ),
+                    ),
+                    [LEADERBOARD_SIZE],
+                ),
+            ],
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 3.2 on 2026-10-18 04:59
+
+from django.db import migrations, models
+import django.db.models.expressions
+from django.db.models import F, FloatField, Sum, Value
+
+# Значение WEIGHTED_RATING_MIN_VOTES на момент миграции.
+WEIGHTED_RATING_MIN_VOTES = 10
+
+
+def fill_weighted_rating(apps, schema_editor):
+    """
+    Заполняет общую статистику оценок по суммам оценок произведений
+    и рассчитывает взвешенный рейтинг произведений.
+    """
+    Title = apps.get_model('reviews', 'Title')
+    RatingStats = apps.get_model('reviews', 'RatingStats')
+    totals = Title.objects.aggregate(
+        score_sum=Sum('rating_sum'), score_count=Sum('rating_count')
+    )
+    score_sum = totals['score_sum'] or 0
+    score_count = totals['score_count'] or 0
+    mean = score_sum / score_count if score_count else None
+    RatingStats.objects.create(
+        pk=1, score_sum=score_sum, score_count=score_count, mean=mean
+    )
+    if mean is None:
+        return
+    Title.objects.filter(rating__isnull=False).update(
+        weighted_rating=(
+            F('rating') * F('rating_count')
+            + Value(mean * WEIGHTED_RATING_MIN_VOTES, output_field=FloatField())
+        ) / (F('rating_count') + WEIGHTED_RATING_MIN_VOTES)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score_sum', models.PositiveBigIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('score_count', models.PositiveBigIntegerField(default=0, verbose_name='Количество оценок')),
+                ('mean', models.FloatField(blank=True, null=True, verbose_name='Средняя оценка взвешенного рейтинга')),
+            ],
+            options={
+                'verbose_name': 'Статистика оценок',
+                'verbose_name_plural': 'Статистика оценок',
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['weighted_rating', 'id'], name='title_weighted_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('weighted_rating'), descending=True, nulls_last=True), django.db.models.expressions.F('id'), name='title_weighted_desc_id_idx'),
+        ),
+        migrations.RunPython(fill_weighted_rating, migrations.RunPython.noop),
+    ]
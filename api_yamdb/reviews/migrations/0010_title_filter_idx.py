@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_weighted_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'year'], name='title_category_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlegenre',
+            index=models.Index(fields=['genre', 'title'], name='titlegenre_genre_title_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 3.2 on 2026-10-18 05:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Min
+
+
+def delete_duplicate_links(apps, schema_editor):
+    """Удаляет повторные связи произведений с жанрами."""
+    TitleGenre = apps.get_model('reviews', 'TitleGenre')
+    first_ids = (
+        TitleGenre.objects
+        .values('title', 'genre')
+        .annotate(first_id=Min('id'))
+        .values('first_id')
+    )
+    TitleGenre.objects.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviews', '0010_title_filter_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', '-pub_date'], name='comment_review_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', '-pub_date'], name='review_title_pub_date_idx'),
+        ),
+        migrations.RunPython(
+            delete_duplicate_links, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='titlegenre',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='unique_title_genre'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='review',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='reviews.review', verbose_name='Отзыв'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='title',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AlterField(
+            model_name='titlegenre',
+            name='genre',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='reviews.genre', verbose_name='Жанр'),
+        ),
+        migrations.AlterField(
+            model_name='titlegenre',
+            name='title',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='reviews.title', verbose_name='Произведение'),
+        ),
+    ]
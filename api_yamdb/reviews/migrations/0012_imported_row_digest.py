@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-18 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_review_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedRowDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=64, verbose_name='Таблица')),
+                ('row_id', models.PositiveBigIntegerField(verbose_name='id строки')),
+                ('digest', models.CharField(max_length=32, verbose_name='Хэш строки')),
+            ],
+            options={
+                'verbose_name': 'Хэш загруженной строки',
+                'verbose_name_plural': 'Хэши загруженных строк',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importedrowdigest',
+            constraint=models.UniqueConstraint(fields=('table', 'row_id'), name='unique_table_row_digest'),
+        ),
+    ]
@@ -1,9 +1,14 @@
 import datetime as dt
+from typing import Optional
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 from .abstracts import BaseNameSlugModel
+from .managers import RatingStatsManager, TitleQuerySet, TitleRankingManager
+from constants import REVIEW_UNIQUE_CONSTRAINT
 from users.models import User
 
 
@@ -41,41 +46,201 @@ class Title(models.Model):
         verbose_name='Категория',
     )
     genre = models.ManyToManyField(Genre, through='TitleGenre')
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    rating = models.FloatField(
+        'Рейтинг', null=True, blank=True, editable=False
+    )
+    weighted_rating = models.FloatField(
+        'Взвешенный рейтинг', null=True, blank=True, editable=False
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор', null=True, editable=False
+    )
+    modified_date = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(fields=('-year', 'id'), name='title_year_id_idx'),
+            models.Index(fields=('rating', 'id'), name='title_rating_id_idx'),
+            models.Index(
+                models.F('rating').desc(nulls_last=True),
+                'id',
+                name='title_rating_desc_id_idx',
+            ),
+            models.Index(
+                fields=('weighted_rating', 'id'),
+                name='title_weighted_rating_id_idx',
+            ),
+            models.Index(
+                models.F('weighted_rating').desc(nulls_last=True),
+                'id',
+                name='title_weighted_desc_id_idx',
+            ),
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(
+                fields=('category', 'year'), name='title_category_year_idx'
+            ),
+            models.Index(
+                'category',
+                models.F('rating').desc(nulls_last=True),
+                'id',
+                name='title_category_rating_idx',
+            ),
+            GinIndex(
+                fields=('search_vector',), name='title_search_vector_idx'
+            ),
+            GinIndex(
+                fields=('name',),
+                name='title_name_trgm_idx',
+                opclasses=('gin_trgm_ops',),
+            ),
+        )
 
     def __str__(self) -> str:
         """Возвращает строковое представление произведения (его название)."""
         return self.name
 
 
+class RatingStats(models.Model):
+    """
+    Модель для хранения общей суммы и количества оценок всех отзывов.
+    Содержит одну строку, которая обновляется вместе с рейтингом
+    произведения, и среднюю оценку, по которой посчитаны
+    взвешенные рейтинги произведений.
+    """
+    score_sum = models.PositiveBigIntegerField('Сумма оценок', default=0)
+    score_count = models.PositiveBigIntegerField(
+        'Количество оценок', default=0
+    )
+    mean = models.FloatField(
+        'Средняя оценка взвешенного рейтинга', null=True, blank=True
+    )
+
+    objects = RatingStatsManager()
+
+    class Meta:
+        verbose_name = 'Статистика оценок'
+        verbose_name_plural = 'Статистика оценок'
+
+    def __str__(self) -> str:
+        """Возвращает строковое представление статистики оценок."""
+        return f'{self.score_sum} / {self.score_count}'
+
+    def get_current_mean(self) -> Optional[float]:
+        """Возвращает среднюю оценку всех отзывов."""
+        if not self.score_count:
+            return None
+        return self.score_sum / self.score_count
+
+
 class TitleGenre(models.Model):
     """Промежуточная модель для хранения ключей genre и title."""
     genre = models.ForeignKey(
-        Genre, on_delete=models.SET_NULL, null=True, verbose_name='Жанр'
+        Genre,
+        on_delete=models.SET_NULL,
+        null=True,
+        db_index=False,
+        verbose_name='Жанр',
     )
     title = models.ForeignKey(
-        Title, on_delete=models.CASCADE, verbose_name='Произведение'
+        Title,
+        on_delete=models.CASCADE,
+        db_index=False,
+        verbose_name='Произведение',
     )
 
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'genre'), name='unique_title_genre'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('genre', 'title'), name='titlegenre_genre_title_idx'
+            ),
+        )
+
     def __str__(self) -> str:
         """Возвращает строковое представление жанра и произведения."""
         return f'{self.title} - {self.genre}'
 
 
+class TitleRanking(models.Model):
+    """
+    Модель для хранения лучших произведений категории или жанра.
+    Каждая строка - место произведения в рейтинге одной группы.
+    """
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        verbose_name='Категория',
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        verbose_name='Жанр',
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        verbose_name='Произведение',
+    )
+    position = models.PositiveSmallIntegerField('Место')
+
+    objects = TitleRankingManager()
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинги'
+        default_related_name = 'rankings'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('category', 'position'),
+                name='unique_category_position',
+            ),
+            models.UniqueConstraint(
+                fields=('genre', 'position'),
+                name='unique_genre_position',
+            ),
+            models.CheckConstraint(
+                check=(
+                    models.Q(category__isnull=False, genre__isnull=True)
+                    | models.Q(category__isnull=True, genre__isnull=False)
+                ),
+                name='ranking_category_or_genre',
+            ),
+        )
+
+    def __str__(self) -> str:
+        """Возвращает строковое представление места в рейтинге."""
+        return f'{self.category or self.genre}: {self.position}. {self.title}'
+
+
 class Review(models.Model):
     """Модель для отзывов."""
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Произведение',
     )
     text = models.TextField(verbose_name='Текст')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Автор'
     )
     score = models.IntegerField(
@@ -86,6 +251,10 @@ class Review(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    modified_date = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -93,7 +262,13 @@ class Review(models.Model):
         constraints = (
             models.UniqueConstraint(
                 fields=['author', 'title'],
-                name='Unique_review'
+                name=REVIEW_UNIQUE_CONSTRAINT
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('title', '-pub_date'),
+                name='review_title_pub_date_idx',
             ),
         )
         default_related_name = 'reviews'
@@ -108,6 +283,7 @@ class Comment(models.Model):
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Отзыв',
     )
     text = models.TextField(verbose_name='Текст')
@@ -120,12 +296,46 @@ class Comment(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    modified_date = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', '-pub_date'),
+                name='comment_review_pub_date_idx',
+            ),
+        )
         default_related_name = 'comments'
 
     def __str__(self) -> str:
         """Возвращает строковое представление комментария."""
         return self.text
+
+
+class ImportedRowDigest(models.Model):
+    """
+    Модель для хранения хэшей строк csv-файлов, загруженных
+    командой import_csv в режиме '--upsert'. По ним повторная
+    загрузка находит строки, которые изменились с прошлого раза.
+    """
+    table = models.CharField('Таблица', max_length=64)
+    row_id = models.PositiveBigIntegerField('id строки')
+    digest = models.CharField('Хэш строки', max_length=32)
+
+    class Meta:
+        verbose_name = 'Хэш загруженной строки'
+        verbose_name_plural = 'Хэши загруженных строк'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('table', 'row_id'), name='unique_table_row_digest'
+            ),
+        )
+
+    def __str__(self) -> str:
+        """Возвращает строковое представление хэша строки."""
+        return f'{self.table} {self.row_id}: {self.digest}'
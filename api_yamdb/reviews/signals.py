@@ -0,0 +1,258 @@
+from functools import partial
+from typing import Any, Optional
+
+from django.db import transaction
+from django.db.models import F, FloatField, Model, QuerySet, Value
+from django.db.models.expressions import Combinable
+from django.db.models.functions import Cast, Now, NullIf
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from .managers import get_weighted_rating
+from .models import (
+    Category, Genre, RatingStats, Review, Title, TitleGenre, TitleRanking
+)
+
+
+def update_title_rating(
+        title_id: int, score_delta: int, count_delta: int
+) -> None:
+    """
+    Атомарно изменяет сумму и количество оценок произведения
+    и всех отзывов, пересчитывает средний и взвешенный рейтинги
+    произведения и обновляет дату его изменения одним UPDATE-запросом.
+    Если изменилась средняя оценка всех отзывов, взвешенный рейтинг
+    пересчитывается у всех произведений.
+    """
+    with transaction.atomic():
+        stats, mean_changed = RatingStats.objects.add_scores(
+            score_delta, count_delta
+        )
+        rating_sum: F = F('rating_sum') + score_delta
+        rating_count: F = F('rating_count') + count_delta
+        rating: Combinable = (
+            Cast(rating_sum, FloatField())
+            / NullIf(rating_count, Value(0))
+        )
+        Title.objects.filter(pk=title_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=rating,
+            weighted_rating=get_weighted_rating(
+                rating, rating_count, stats.mean
+            ),
+            modified_date=Now(),
+        )
+        if mean_changed:
+            Title.objects.update_weighted_rating(stats.mean)
+
+
+def schedule_rankings_refresh(title_id: int) -> None:
+    """
+    Откладывает пересчет рейтингов групп произведения до фиксации
+    транзакции, чтобы не продлевать ее и не ссылаться
+    на произведения, которые удаляются в этой же транзакции.
+    """
+    transaction.on_commit(
+        partial(TitleRanking.objects.refresh_titles, (title_id,))
+    )
+
+
+def get_related_titles(instance: Model) -> QuerySet:
+    """
+    Возвращает произведения, связанные с категорией или жанром.
+    Поля произведения называются так же, как модели связанных объектов.
+    """
+    return Title.objects.filter(**{instance._meta.model_name: instance})
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(
+        sender: type[Review], instance: Review, raw: bool, **kwargs: Any
+) -> None:
+    """Запоминает оценку отзыва, сохраненную в базе данных до изменения."""
+    instance._previous_score = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_score = (
+        Review.objects
+        .filter(pk=instance.pk)
+        .values_list('score', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def add_review_score(
+        sender: type[Review], instance: Review,
+        created: bool, raw: bool, **kwargs: Any
+) -> None:
+    """Учитывает оценку нового или измененного отзыва в рейтинге."""
+    if raw:
+        return
+    if created:
+        update_title_rating(instance.title_id, instance.score, 1)
+        schedule_rankings_refresh(instance.title_id)
+        return
+    previous_score: int = instance._previous_score
+    if previous_score is not None and previous_score != instance.score:
+        update_title_rating(
+            instance.title_id, instance.score - previous_score, 0
+        )
+        schedule_rankings_refresh(instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(
+        sender: type[Review], instance: Review, **kwargs: Any
+) -> None:
+    """Исключает оценку удаленного отзыва из рейтинга."""
+    update_title_rating(instance.title_id, -instance.score, -1)
+    schedule_rankings_refresh(instance.title_id)
+
+
+@receiver(post_save, sender=Title)
+def refresh_saved_title_rankings(
+        sender: type[Title], instance: Title,
+        created: bool, raw: bool, **kwargs: Any
+) -> None:
+    """Пересчитывает рейтинги при изменении категории произведения."""
+    if not created and not raw:
+        schedule_rankings_refresh(instance.pk)
+
+
+@receiver(post_save, sender=TitleGenre)
+@receiver(post_delete, sender=TitleGenre)
+def refresh_title_genre_rankings(
+        sender: type[TitleGenre], instance: TitleGenre, **kwargs: Any
+) -> None:
+    """Пересчитывает рейтинги при изменении связи с жанром."""
+    if not kwargs.get('raw'):
+        schedule_rankings_refresh(instance.title_id)
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def refresh_genres_rankings(
+        sender: type[TitleGenre], instance: Model, action: str,
+        reverse: bool, **kwargs: Any
+) -> None:
+    """Пересчитывает рейтинги при изменении жанров произведения."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_rankings_refresh(instance.pk)
+    else:
+        transaction.on_commit(
+            partial(TitleRanking.objects.refresh, genres=(instance.pk,))
+        )
+
+
+@receiver(pre_delete, sender=Title)
+def remember_title_rankings(
+        sender: type[Title], instance: Title, **kwargs: Any
+) -> None:
+    """Запоминает группы, в рейтинге которых есть удаляемое произведение."""
+    rankings: QuerySet = TitleRanking.objects.filter(title=instance)
+    instance._ranking_categories = list(
+        rankings.filter(category__isnull=False)
+        .values_list('category_id', flat=True)
+    )
+    instance._ranking_genres = list(
+        rankings.filter(genre__isnull=False)
+        .values_list('genre_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Title)
+def refresh_deleted_title_rankings(
+        sender: type[Title], instance: Title, **kwargs: Any
+) -> None:
+    """Заполняет место удаленного произведения в рейтингах."""
+    transaction.on_commit(partial(
+        TitleRanking.objects.refresh,
+        instance._ranking_categories,
+        instance._ranking_genres,
+    ))
+
+
+@receiver(post_save, sender=Title)
+def update_title_search_vector(
+        sender: type[Title], instance: Title, raw: bool, **kwargs: Any
+) -> None:
+    """Пересчитывает поисковый вектор сохраненного произведения."""
+    if not raw:
+        Title.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def update_genres_search_vector(
+        sender: type[TitleGenre], instance: Model, action: str,
+        reverse: bool, pk_set: Optional[set[int]], **kwargs: Any
+) -> None:
+    """Пересчитывает поисковый вектор при изменении жанров произведения."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Title.objects.filter(pk=instance.pk).update_search_vector()
+        return
+    if action == 'pre_clear':
+        instance._title_ids = list(
+            get_related_titles(instance).values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        Title.objects.filter(pk__in=instance._title_ids).update_search_vector()
+    elif action in ('post_add', 'post_remove'):
+        Title.objects.filter(pk__in=pk_set).update_search_vector()
+
+
+@receiver(post_save, sender=TitleGenre)
+@receiver(post_delete, sender=TitleGenre)
+def update_title_genre_search_vector(
+        sender: type[TitleGenre], instance: TitleGenre, **kwargs: Any
+) -> None:
+    """Пересчитывает поисковый вектор при изменении связи с жанром."""
+    if not kwargs.get('raw'):
+        Title.objects.filter(pk=instance.title_id).update_search_vector()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def update_related_search_vector(
+        sender: type[Model], instance: Model,
+        created: bool, raw: bool, **kwargs: Any
+) -> None:
+    """
+    Пересчитывает поисковый вектор произведений при изменении названия
+    и обновляет их дату изменения: слаг входит в ответ API,
+    но не в вектор.
+    """
+    if not created and not raw:
+        titles: QuerySet = get_related_titles(instance)
+        titles.update_search_vector()
+        titles.update(modified_date=Now())
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def remember_related_titles(
+        sender: type[Model], instance: Model, **kwargs: Any
+) -> None:
+    """Запоминает произведения, связанные с удаляемым объектом."""
+    instance._title_ids = list(
+        get_related_titles(instance).values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def update_unlinked_search_vector(
+        sender: type[Model], instance: Model, **kwargs: Any
+) -> None:
+    """
+    Пересчитывает поисковый вектор произведений удаленного объекта
+    и обновляет их дату изменения.
+    """
+    titles: QuerySet = Title.objects.filter(pk__in=instance._title_ids)
+    titles.update_search_vector()
+    titles.update(modified_date=Now())
@@ -29,5 +29,9 @@ class User(AbstractUser):
         choices=Role.choices,
         default=Role.USER
     )
+    modified_date = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
 
     objects = UserManager()
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+import pytest
+
+from constants import WEIGHTED_RATING_MIN_VOTES
+from reviews.models import RatingStats
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, admin_client, user,
+                                              user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            user_client, title_id, 'review', 3
+        ).json()['id']
+        create_single_review(moderator_client, title_id, 'review', 8)
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что после создания отзывов рейтинг произведения '
+            'равен средней оценке.'
+        )
+
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            ),
+            data={'score': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(admin_client, title_id) == 9, (
+            'Проверьте, что после изменения оценки в отзыве рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        response = user_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 8, (
+            'Проверьте, что после удаления отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+
+    def test_02_rating_after_author_deleted(self, admin_client, user,
+                                            user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'review', 7)
+        assert self.get_rating(admin_client, title_id) == 7
+
+        user.delete()
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Проверьте, что при удалении автора его отзывы исключаются из '
+            'рейтинга произведения.'
+        )
+
+    def test_03_weighted_rating(self, client, admin_client, user_client,
+                                moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': ['horror'],
+            'category': 'films',
+        })
+        single_id = titles[0]['id']
+        popular_id = titles[1]['id']
+        poor_id = response.json()['id']
+        create_single_review(user_client, single_id, 'review', 10)
+        for author_client in (admin_client, user_client, moderator_client):
+            create_single_review(author_client, popular_id, 'review', 9)
+            create_single_review(author_client, poor_id, 'review', 1)
+
+        stats = RatingStats.objects.get()
+        assert (stats.score_sum, stats.score_count) == (40, 7), (
+            'Проверьте, что общая сумма и количество оценок обновляются '
+            'при добавлении отзывов.'
+        )
+        response = client.get(
+            '/api/v1/titles/', {'ordering': '-weighted_rating'}
+        )
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [
+            popular_id, single_id, poor_id
+        ], (
+            'Проверьте, что при сортировке `ordering=-weighted_rating` '
+            'произведение с одной высокой оценкой уступает произведению '
+            'со многими высокими оценками.'
+        )
+        weighted_rating = results[0]['weighted_rating']
+        expected = (27 + stats.mean * WEIGHTED_RATING_MIN_VOTES) / (
+            3 + WEIGHTED_RATING_MIN_VOTES
+        )
+        assert weighted_rating == pytest.approx(expected), (
+            'Проверьте, что взвешенный рейтинг рассчитывается по средней '
+            'оценке всех отзывов.'
+        )
+        detail = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=popular_id)
+        ).json()
+        assert detail['weighted_rating'] == weighted_rating
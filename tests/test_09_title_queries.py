@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.caches import bump_cache_version
+from constants import GENRES_RESOURCE
+from reviews.models import Genre
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        return len(context.captured_queries)
+
+    def test_01_title_list_queries_do_not_depend_on_page_size(
+            self, client, admin_client, user_client
+    ):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'review', 7)
+        few_titles_queries = self.count_queries(client, self.TITLES_URL)
+
+        for idx in range(3):
+            admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': ['horror', 'comedy', 'drama'],
+                'category': 'films',
+            })
+        many_titles_queries = self.count_queries(client, self.TITLES_URL)
+        assert many_titles_queries == few_titles_queries, (
+            f'Проверьте, что количество запросов к базе данных при GET-запросе '
+            f'к `{self.TITLES_URL}` не зависит от количества произведений на '
+            'странице.'
+        )
+
+    def test_02_title_detail_queries(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        assert self.count_queries(client, url) <= 3, (
+            f'Проверьте, что GET-запрос к `{self.TITLE_DETAIL_URL_TEMPLATE}` '
+            'загружает дату изменения, категорию и жанры произведения '
+            'не более чем тремя запросами к базе данных.'
+        )
+
+    def test_03_title_write_resolves_slugs_from_cache(
+            self, admin_client, monkeypatch
+    ):
+        create_titles(admin_client)
+        data = {
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': ['horror', 'drama'],
+            'category': 'films',
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        slug_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"slug" =' in query['sql'] or '"slug" IN' in query['sql']
+        ]
+        assert not slug_queries, (
+            f'Проверьте, что POST-запрос к `{self.TITLES_URL}` находит '
+            'категорию и жанры по слагам без запросов к базе данных.'
+        )
+
+        monkeypatch.setattr('api.caches.SLUG_CACHE_CHECK_INTERVAL', 0)
+        Genre.objects.filter(slug='drama').update(slug='dramas')
+        bump_cache_version(GENRES_RESOURCE)
+        response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что кэш слагов сбрасывается при смене версии '
+            'жанров в общем кэше.'
+        )
+        data['genre'] = ['dramas']
+        response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED
@@ -0,0 +1,348 @@
+import json
+from base64 import urlsafe_b64encode
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.caches import get_cache_version
+from constants import GENRES_RESOURCE, TITLES_RESOURCE
+from reviews.models import Genre
+from tests.utils import create_single_review, create_titles
+
+
+def create_many_titles(admin_client, count):
+    create_titles(admin_client)
+    for idx in range(count):
+        admin_client.post('/api/v1/titles/', data={
+            'name': f'Произведение {idx}',
+            'year': 2000 + idx % 3,
+            'genre': ['drama'],
+            'category': 'books',
+        })
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TitleList:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_cursor_pagination(self, client, admin_client):
+        create_many_titles(admin_client, 10)
+        response = client.get(self.TITLES_URL, {'pagination': 'cursor'})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data and 'next' in data, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`pagination=cursor` возвращает курсорную пагинацию без '
+            'подсчета количества объектов.'
+        )
+        pages = [data['results']]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append(data['results'])
+        ids = [title['id'] for page in pages for title in page]
+        years_and_ids = [
+            (title['year'], title['id']) for page in pages for title in page
+        ]
+        assert years_and_ids == sorted(
+            years_and_ids, key=lambda item: (-item[0], item[1])
+        ), (
+            'Проверьте, что курсорная пагинация упорядочивает произведения '
+            'по убыванию года и возрастанию `id`.'
+        )
+        assert len(ids) == len(set(ids)) == 12, (
+            'Проверьте, что курсорная пагинация возвращает каждое '
+            'произведение ровно один раз.'
+        )
+
+        previous = client.get(data['previous']).json()
+        assert previous['results'] == pages[-2], (
+            'Проверьте, что ссылка `previous` курсорной пагинации ведет на '
+            'предыдущую страницу.'
+        )
+
+    def test_02_invalid_cursor(self, client):
+        response = client.get(self.TITLES_URL, {'cursor': 'invalid'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        for position in (['abc', 1], [[1], 2], [None, 1], [1.5, 'x']):
+            cursor = urlsafe_b64encode(
+                json.dumps({'p': position, 'r': 0}).encode()
+            ).decode()
+            response = client.get(self.TITLES_URL, {'cursor': cursor})
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что курсор со значениями, которые не приводятся '
+                'к типам полей сортировки, отклоняется со статусом 404.'
+            )
+
+    def test_03_page_number_pagination_kept(self, client, admin_client):
+        create_many_titles(admin_client, 4)
+        data = client.get(self.TITLES_URL, {'page': 2}).json()
+        assert data['count'] == 6 and len(data['results']) == 1, (
+            f'Проверьте, что без параметра `pagination` GET-запрос к '
+            f'`{self.TITLES_URL}` возвращает постраничную пагинацию.'
+        )
+
+    def test_04_fulltext_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(
+            self.TITLES_URL, {'search': 'ужасов', 'search_mode': 'fulltext'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        found = [title['id'] for title in response.json()['results']]
+        assert found == [titles[0]['id']], (
+            'Проверьте, что полнотекстовый поиск по произведениям учитывает '
+            'названия жанров.'
+        )
+
+        admin_client.delete('/api/v1/genres/horror/')
+        response = client.get(
+            self.TITLES_URL, {'search': 'ужасов', 'search_mode': 'fulltext'}
+        )
+        assert response.json()['results'] == [], (
+            'Проверьте, что поисковый вектор произведения обновляется при '
+            'удалении жанра.'
+        )
+        response = client.get(
+            self.TITLES_URL, {'search': 'орешек', 'search_mode': 'fulltext'}
+        )
+        found = [title['id'] for title in response.json()['results']]
+        assert found == [titles[1]['id']], (
+            'Проверьте, что полнотекстовый поиск по произведениям учитывает '
+            'название произведения.'
+        )
+
+    def test_05_name_filter(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for name in ('орешек', 'Крепкий орешик'):
+            response = client.get(self.TITLES_URL, {'name': name})
+            assert response.status_code == HTTPStatus.OK
+            found = [title['id'] for title in response.json()['results']]
+            assert found == [titles[1]['id']], (
+                'Проверьте, что фильтр `name` находит произведения по '
+                'подстроке названия и по названию с опечаткой.'
+            )
+
+        response = client.get(
+            self.TITLES_URL, {'name': 'Крепкий орешик', 'name_similarity': 1}
+        )
+        assert response.json()['results'] == [], (
+            'Проверьте, что параметр `name_similarity` задает порог '
+            'сходства названий.'
+        )
+        response = client.get(
+            self.TITLES_URL, {'name': 'орешек', 'name_similarity': 2}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_06_anonymous_list_cache(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        client.get(self.TITLES_URL)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL)
+        assert response.json()['count'] == 2
+        assert not any(
+            'reviews_title' in query['sql']
+            for query in context.captured_queries
+        ), (
+            f'Проверьте, что повторный GET-запрос анонимного пользователя к '
+            f'`{self.TITLES_URL}` обслуживается из кэша.'
+        )
+
+        create_single_review(user_client, titles[0]['id'], 'review', 6)
+        results = client.get(self.TITLES_URL).json()['results']
+        ratings = {title['id']: title['rating'] for title in results}
+        assert ratings[titles[0]['id']] == 6, (
+            'Проверьте, что кэш списка произведений сбрасывается при '
+            'добавлении отзыва.'
+        )
+
+        client.get('/api/v1/genres/')
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Вестерн', 'slug': 'western'}
+        )
+        response = client.get('/api/v1/genres/')
+        assert response.json()['count'] == 4, (
+            'Проверьте, что кэш списка жанров сбрасывается при '
+            'добавлении жанра.'
+        )
+
+    def test_07_sparse_fields(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'review', 6)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                self.TITLES_URL, {'fields': 'id,name,rating'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        for title in response.json()['results']:
+            assert set(title) == {'id', 'name', 'rating'}, (
+                f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с '
+                'параметром `fields` возвращает только запрошенные поля.'
+            )
+        queries = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'description' not in queries and 'genre' not in queries, (
+            'Проверьте, что при запросе части полей произведения описание '
+            'и жанры не загружаются из базы данных.'
+        )
+
+        response = user_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            {'fields': 'score,author'}
+        )
+        assert response.json()['results'] == [
+            {'author': 'TestUser', 'score': 6}
+        ], (
+            'Проверьте, что параметр `fields` ограничивает поля отзывов.'
+        )
+
+    def test_08_ordering(self, client, admin_client, user_client):
+        create_many_titles(admin_client, 3)
+        titles = client.get(self.TITLES_URL).json()['results']
+        create_single_review(user_client, titles[0]['id'], 'review', 3)
+        create_single_review(user_client, titles[1]['id'], 'review', 9)
+
+        def get_results(ordering):
+            response = client.get(self.TITLES_URL, {'ordering': ordering})
+            assert response.status_code == HTTPStatus.OK
+            return response.json()['results']
+
+        ratings = [title['rating'] for title in get_results('-rating')]
+        assert ratings[:2] == [9, 3] and ratings[2:] == [None] * 3, (
+            'Проверьте, что сортировка `ordering=-rating` упорядочивает '
+            'произведения по убыванию рейтинга, а произведения без рейтинга '
+            'идут последними.'
+        )
+        ratings = [title['rating'] for title in get_results('rating')]
+        assert ratings[:2] == [3, 9]
+
+        names = [title['name'] for title in get_results('name')]
+        assert names == sorted(names), (
+            'Проверьте, что сортировка `ordering=name` упорядочивает '
+            'произведения по названию.'
+        )
+        years_and_ids = [
+            (title['year'], title['id']) for title in get_results('year')
+        ]
+        assert years_and_ids == sorted(
+            years_and_ids, key=lambda item: (item[0], -item[1])
+        )
+
+    def test_09_facets(self, client, admin_client):
+        create_many_titles(admin_client, 3)
+        response = client.get(
+            self.TITLES_URL,
+            {'facets': 'genre,category,year', 'genre': 'drama'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert len(data['results']) == data['count'] == 4
+        assert data['facets'] == {
+            'genre': [{'value': 'drama', 'count': 4}],
+            'category': [{'value': 'books', 'count': 4}],
+            'year': [
+                {'value': 2000, 'count': 3},
+                {'value': 1980, 'count': 1},
+            ],
+        }, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`facets` возвращает количество произведений отфильтрованной '
+            'выборки по жанрам, категориям и десятилетиям.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                self.TITLES_URL, {'facets': 'genre', 'pagination': 'cursor'}
+            )
+        assert response.json()['facets']['genre'] == [
+            {'value': 'drama', 'count': 4},
+            {'value': 'comedy', 'count': 1},
+            {'value': 'horror', 'count': 1},
+        ]
+        facet_queries = [
+            query for query in context.captured_queries
+            if 'GROUP BY' in query['sql']
+        ]
+        assert len(facet_queries) == 1, (
+            'Проверьте, что количество произведений по фасетам считается '
+            'одним запросом.'
+        )
+
+        response = client.get(self.TITLES_URL, {'facets': 'unknown'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_10_multi_value_filters(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator_id, die_hard_id = titles[0]['id'], titles[1]['id']
+
+        def get_ids(params):
+            response = client.get(self.TITLES_URL, params)
+            assert response.status_code == HTTPStatus.OK
+            return sorted(title['id'] for title in response.json()['results'])
+
+        assert get_ids({'genre': 'horror,comedy,drama'}) == sorted(
+            [terminator_id, die_hard_id]
+        ), (
+            'Проверьте, что фильтр `genre` со списком слагов возвращает '
+            'произведения с любым из жанров без повторов.'
+        )
+        assert get_ids(
+            {'genre': 'horror,comedy', 'genre_mode': 'and'}
+        ) == [terminator_id], (
+            'Проверьте, что фильтр `genre` с параметром `genre_mode=and` '
+            'возвращает произведения со всеми перечисленными жанрами.'
+        )
+        assert get_ids({'genre': 'horror,drama', 'genre_mode': 'and'}) == []
+        assert get_ids({'category': 'films,books'}) == sorted(
+            [terminator_id, die_hard_id]
+        )
+        assert get_ids(
+            {'category': 'films,books', 'year_min': 1985, 'year_max': 1990}
+        ) == [die_hard_id], (
+            'Проверьте, что параметры `year_min` и `year_max` ограничивают '
+            'год выхода произведений.'
+        )
+
+    def test_11_cache_version_after_commit(self):
+        resources = (GENRES_RESOURCE, TITLES_RESOURCE)
+        versions = [get_cache_version(resource) for resource in resources]
+        with transaction.atomic():
+            Genre.objects.create(name='Вестерн', slug='western')
+            assert [
+                get_cache_version(resource) for resource in resources
+            ] == versions, (
+                'Проверьте, что версия кэша меняется только после фиксации '
+                'транзакции, иначе параллельный запрос закэширует прежние '
+                'данные под новой версией.'
+            )
+        assert all(
+            get_cache_version(resource) != version
+            for resource, version in zip(resources, versions)
+        )
+
+    def test_12_cache_key_params(self, client, admin_client):
+        create_titles(admin_client)
+        client.get(self.TITLES_URL, {'year_min': 1900})
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                self.TITLES_URL, {'year_min': 1900, 'unknown': 'value'}
+            )
+        assert response.json()['count'] == 2
+        assert not any(
+            'reviews_title' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что параметры запроса, которые не понимает '
+            'представление, не входят в ключ кэша списка произведений.'
+        )
+        version_reads = [
+            query for query in context.captured_queries
+            if f'version:{TITLES_RESOURCE}' in query['sql']
+        ]
+        assert len(version_reads) == 1, (
+            'Проверьте, что версия ресурса читается один раз за запрос: '
+            'для валидаторов ответа и для ключа кэша.'
+        )
+        response = client.get(self.TITLES_URL, {'year_min': 2100})
+        assert response.json()['count'] == 0
@@ -0,0 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+
+from reviews.models import Title
+from tests.utils import create_comments, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header('ETag') and response.has_header(
+            'Last-Modified'
+        ), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        etag = response['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с заголовком '
+            '`If-None-Match`, совпадающим с `ETag`, возвращает ответ со '
+            'статусом 304.'
+        )
+        return etag
+
+    def test_01_not_modified(self, client, admin_client, admin, user,
+                             user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        urls = (
+            self.TITLES_URL,
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_id),
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            ),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            ),
+        )
+        etags = {url: self.check_not_modified(client, url) for url in urls}
+
+        response = admin_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            ),
+            data={'score': 1}
+        )
+        assert response.status_code == HTTPStatus.OK
+        for url in urls[:4]:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после изменения отзыва GET-запрос к `{url}` '
+                'с устаревшим `ETag` возвращает ответ со статусом 200.'
+            )
+
+    def get_in_other_connection(self, client, url):
+        """
+        Выполняет GET-запрос в отдельном потоке со своим соединением,
+        которое не видит незафиксированных изменений.
+        """
+        def get():
+            try:
+                return client.get(url)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(get).result()
+
+    def test_02_list_read_during_review_write(self, client, admin_client,
+                                              user_client, monkeypatch):
+        # Запись в кэш в базе данных входит в транзакцию автора отзыва,
+        # а запись в общий кэш вроде Redis видна другим процессам сразу.
+        api_cache = LocMemCache('test_11', {})
+        monkeypatch.setattr('api.caches.api_cache', api_cache)
+        monkeypatch.setattr('api.mixins.api_cache', api_cache)
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        etag = client.get(self.TITLES_URL)['ETag']
+        with transaction.atomic():
+            create_single_review(user_client, title_id, 'review', 6)
+            response = self.get_in_other_connection(client, self.TITLES_URL)
+            assert response['ETag'] == etag, (
+                'Проверьте, что до фиксации отзыва список произведений '
+                'отдается с прежним `ETag`.'
+            )
+
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        ratings = {
+            title['id']: title['rating']
+            for title in response.json()['results']
+        }
+        assert ratings[title_id] == 6, (
+            'Проверьте, что список произведений, прочитанный во время '
+            'добавления отзыва, не кэшируется под новой версией: после '
+            'фиксации отзыва список должен содержать новый рейтинг.'
+        )
+
+    def test_03_related_data_changes(self, client, admin_client, admin,
+                                     user, user_client, moderator,
+                                     moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        etag = self.check_not_modified(client, title_url)
+        category = Title.objects.get(pk=title_id).category
+        category.slug = 'renamed-category'
+        category.save()
+        response = client.get(title_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения категории GET-запрос к '
+            f'`{title_url}` с устаревшим `ETag` возвращает ответ со '
+            'статусом 200.'
+        )
+        assert response.json()['category']['slug'] == 'renamed-category'
+
+        user_review_id = next(
+            review['id'] for review in reviews
+            if review['author'] == user.username
+        )
+        urls = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_id),
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=user_review_id
+            ),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            ),
+        )
+        etags = {url: self.check_not_modified(client, url) for url in urls}
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'username': 'renamed_user'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что после изменения имени автора GET-запрос к '
+                f'`{url}` с устаревшим `ETag` возвращает ответ со статусом '
+                '200.'
+            )
+        assert 'renamed_user' in response.content.decode()
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleBatch:
+
+    TITLES_BULK_URL = '/api/v1/titles/bulk/'
+
+    def test_01_bulk_create(self, admin_client, client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': ['horror', 'drama'],
+                'category': 'films',
+            }
+            for idx in range(10)
+        ]
+        data.insert(3, {
+            'name': 'Без категории',
+            'year': 2000,
+            'genre': ['horror'],
+            'category': 'unknown',
+        })
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                self.TITLES_BULK_URL, data=data, format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к '
+            f'`{self.TITLES_BULK_URL}` создает произведения и возвращает '
+            'ответ со статусом 201.'
+        )
+        response_data = response.json()
+        assert len(response_data['created']) == 10
+        assert response_data['errors'][0]['index'] == 3
+        assert 'category' in response_data['errors'][0]['errors'], (
+            'Проверьте, что ошибки валидации возвращаются для каждого '
+            'произведения отдельно.'
+        )
+        assert len(context.captured_queries) < 15, (
+            'Проверьте, что количество запросов при массовом создании '
+            'произведений не зависит от размера пакета.'
+        )
+        created = response_data['created'][0]
+        assert [genre['slug'] for genre in created['genre']] == [
+            'horror', 'drama'
+        ]
+        assert client.get('/api/v1/titles/').json()['count'] == 10
+
+        response = admin_client.post(
+            self.TITLES_BULK_URL, data=data[3:4], format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_bulk_create_permissions(self, user_client):
+        response = user_client.post(
+            self.TITLES_BULK_URL, data=[], format='json'
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_03_titles_by_ids(self, admin_client, client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': ['horror', 'drama'],
+                'category': 'films',
+            }
+            for idx in range(8)
+        ]
+        response = admin_client.post(
+            self.TITLES_BULK_URL, data=data, format='json'
+        )
+        ids = [title['id'] for title in response.json()['created']]
+        requested = [ids[6], ids[0], ids[3], ids[7], ids[1], ids[5]]
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                '/api/v1/titles/',
+                {'ids': ','.join(map(str, requested))},
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert [title['id'] for title in response.json()] == requested, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/?ids=` возвращает '
+            'все запрошенные произведения в порядке списка `ids`.'
+        )
+        assert response.json()[0]['genre'][0]['slug'] == 'horror'
+        few_queries = len(context.captured_queries)
+        with CaptureQueriesContext(connection) as context:
+            client.get('/api/v1/titles/', {'ids': str(ids[0])})
+        assert len(context.captured_queries) == few_queries, (
+            'Проверьте, что количество запросов к базе данных при выборке '
+            'произведений по списку `ids` не зависит от его длины.'
+        )
+
+        response = client.get(
+            '/api/v1/titles/', {'ids': ','.join(['1'] * 201)}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,53 @@
+import pytest
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import TitleRowSerializer, TitleSerializer
+from reviews.models import Genre, Title
+from tests.utils import create_single_review, create_titles
+
+def get_full_queryset():
+    return (
+        Title.objects
+        .order_by('-year', 'id')
+        .select_related('category')
+        .prefetch_related(
+            Prefetch('genre', queryset=Genre.objects.order_by('id'))
+        )
+    )
+
+
+def get_rows_queryset():
+    return Title.objects.order_by('-year', 'id').values(
+        *TitleRowSerializer.get_columns(TitleSerializer.Meta.fields)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleRowSerializer:
+
+    def test_01_same_json_as_title_serializer(self, client, admin_client,
+                                              user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'review', 7)
+        Title.objects.create(name='Без категории', year=1990)
+
+        renderer = JSONRenderer()
+        full = renderer.render(
+            TitleSerializer(get_full_queryset(), many=True).data
+        )
+        fast = renderer.render(
+            TitleRowSerializer(get_rows_queryset(), many=True).data
+        )
+        assert fast == full, (
+            'Проверьте, что TitleRowSerializer формирует тот же JSON, что и '
+            'TitleSerializer.'
+        )
+
+        response = client.get('/api/v1/titles/')
+        for title in response.json()['results']:
+            detail = client.get(f'/api/v1/titles/{title["id"]}/').json()
+            assert title == detail, (
+                'Проверьте, что произведение в списке `/api/v1/titles/` '
+                'совпадает с ответом на запрос этого произведения.'
+            )
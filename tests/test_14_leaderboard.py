@@ -0,0 +1,185 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from constants import LEADERBOARD_SIZE
+from reviews.models import Genre, Review, Title, TitleRanking
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Leaderboard:
+
+    CATEGORY_TOP_URL_TEMPLATE = '/api/v1/categories/{slug}/top/'
+    GENRE_TOP_URL_TEMPLATE = '/api/v1/genres/{slug}/top/'
+
+    def get_top_ids(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+            'со статусом 200.'
+        )
+        return [title['id'] for title in response.json()]
+
+    def test_01_top_follows_reviews(self, client, admin_client, user_client,
+                                    moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': ['horror'],
+            'category': 'films',
+        })
+        alien_id = response.json()['id']
+        terminator_id = titles[0]['id']
+        category_url = self.CATEGORY_TOP_URL_TEMPLATE.format(slug='films')
+        genre_url = self.GENRE_TOP_URL_TEMPLATE.format(slug='horror')
+        assert self.get_top_ids(client, category_url) == [], (
+            'Проверьте, что произведения без оценок не попадают в рейтинг.'
+        )
+
+        create_single_review(user_client, terminator_id, 'review', 6)
+        review_id = create_single_review(
+            user_client, alien_id, 'review', 4
+        ).json()['id']
+        for url in (category_url, genre_url):
+            assert self.get_top_ids(client, url) == [
+                terminator_id, alien_id
+            ], (
+                f'Проверьте, что `{url}` возвращает произведения по '
+                'убыванию рейтинга и обновляется при добавлении отзыва.'
+            )
+
+        user_client.patch(
+            f'/api/v1/titles/{alien_id}/reviews/{review_id}/',
+            data={'score': 9}
+        )
+        assert self.get_top_ids(client, genre_url) == [
+            alien_id, terminator_id
+        ], (
+            'Проверьте, что рейтинг жанра обновляется при изменении оценки.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{alien_id}/', data={'category': 'books'}
+        )
+        assert self.get_top_ids(client, category_url) == [terminator_id], (
+            'Проверьте, что рейтинг категории обновляется при изменении '
+            'категории произведения.'
+        )
+        top_books = self.get_top_ids(
+            client, self.CATEGORY_TOP_URL_TEMPLATE.format(slug='books')
+        )
+        assert top_books == [alien_id]
+
+        admin_client.delete(f'/api/v1/titles/{terminator_id}/')
+        assert self.get_top_ids(client, genre_url) == [alien_id], (
+            'Проверьте, что удаленное произведение исключается из рейтинга.'
+        )
+
+    def test_02_not_found(self, client):
+        for url_template in (
+            self.CATEGORY_TOP_URL_TEMPLATE, self.GENRE_TOP_URL_TEMPLATE
+        ):
+            url = url_template.format(slug='unknown')
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` для несуществующего '
+                'слага возвращает ответ со статусом 404.'
+            )
+
+    def test_03_rebuild_command(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        for title in titles:
+            create_single_review(user_client, title['id'], 'review', 5)
+        rankings = set(TitleRanking.objects.values_list(
+            'category', 'genre', 'title', 'position'
+        ))
+        assert len(rankings) == 5
+        TitleRanking.objects.all().delete()
+        call_command('rebuild_rankings', stdout=StringIO())
+        assert set(TitleRanking.objects.values_list(
+            'category', 'genre', 'title', 'position'
+        )) == rankings, (
+            'Проверьте, что команда `rebuild_rankings` перестраивает '
+            'рейтинги так же, как их обновление при добавлении отзывов.'
+        )
+
+    def get_rankings(self):
+        return set(TitleRanking.objects.values_list(
+            'category', 'genre', 'title', 'position'
+        ))
+
+    def test_04_incremental_update(self, user, admin, moderator):
+        genre = Genre.objects.create(name='Вестерн', slug='western')
+        titles = []
+        for idx in range(LEADERBOARD_SIZE + 2):
+            title = Title.objects.create(name=f'Вестерн {idx}', year=1960)
+            title.genre.add(genre)
+            Review.objects.create(
+                title=title, author=user, text='review', score=idx % 9 + 2
+            )
+            titles.append(title)
+        assert TitleRanking.objects.filter(genre=genre).count() == (
+            LEADERBOARD_SIZE
+        )
+        rankings = self.get_rankings()
+        TitleRanking.objects.rebuild()
+        assert self.get_rankings() == rankings
+
+        outsider = (
+            Title.objects.filter(genre=genre, rankings__isnull=True)
+            .order_by('rating', 'id').first()
+        )
+        with CaptureQueriesContext(connection) as context:
+            Review.objects.create(
+                title=outsider, author=admin, text='review', score=1
+            )
+        ranking_writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('DELETE', 'INSERT'))
+            and TitleRanking._meta.db_table in query['sql']
+        ]
+        assert not ranking_writes, (
+            'Проверьте, что отзыв на произведение, которое не входит '
+            'в рейтинг группы и не попадает в него, не перезаписывает '
+            'рейтинг группы.'
+        )
+        locks = [
+            query['sql'] for query in context.captured_queries
+            if 'FOR' in query['sql'] and 'UPDATE' in query['sql']
+            and 'reviews_genre' in query['sql']
+        ]
+        assert locks and all('FOR NO KEY UPDATE' in sql for sql in locks), (
+            'Проверьте, что строка группы блокируется FOR NO KEY UPDATE и '
+            'не мешает вставке ссылающихся на нее строк.'
+        )
+        assert self.get_rankings() == rankings
+
+        review = Review.objects.get(title=outsider, author=admin)
+        review.score = 10
+        review.save()
+        Review.objects.create(
+            title=outsider, author=moderator, text='review', score=10
+        )
+        updated = self.get_rankings()
+        assert outsider.pk in {title_id for _, _, title_id, _ in updated}, (
+            'Проверьте, что произведение с высоким рейтингом входит '
+            'в рейтинг группы.'
+        )
+        TitleRanking.objects.rebuild()
+        assert self.get_rankings() == updated, (
+            'Проверьте, что пошаговое обновление рейтинга дает тот же '
+            'результат, что и его полное перестроение.'
+        )
+
+        Review.objects.filter(title=outsider).delete()
+        for title in titles[:3]:
+            Review.objects.filter(title=title).delete()
+        updated = self.get_rankings()
+        TitleRanking.objects.rebuild()
+        assert self.get_rankings() == updated
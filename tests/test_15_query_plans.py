@@ -0,0 +1,130 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, TitleGenre
+from tests.test_10_title_list import create_many_titles
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15QueryPlans:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def get_plan(self, query, disabled=('enable_seqscan',)):
+        """
+        Возвращает план запроса. В тестовой базе таблицы малы,
+        поэтому последовательное чтение запрещается: план
+        показывает, может ли запрос обойтись индексом.
+        """
+        with connection.cursor() as cursor:
+            for setting in disabled:
+                cursor.execute(f'SET {setting} TO off')
+            try:
+                if isinstance(query, str):
+                    cursor.execute(f'EXPLAIN {query}')
+                    return '\n'.join(row[0] for row in cursor.fetchall())
+                return query.explain()
+            finally:
+                for setting in disabled:
+                    cursor.execute(f'RESET {setting}')
+
+    def get_list_query(self, client, url, table):
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{table}"' in query['sql']
+            and 'ORDER BY' in query['sql']
+        ]
+        assert queries, f'Не найден запрос списка к `{url}`.'
+        return queries[-1]
+
+    def test_01_list_queries_use_indexes(self, client, admin_client, admin,
+                                         user, user_client, moderator,
+                                         moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        cases = (
+            (
+                self.REVIEWS_URL_TEMPLATE.format(title_id=title_id),
+                'reviews_review',
+                'review_title_pub_date_idx',
+            ),
+            (
+                self.COMMENTS_URL_TEMPLATE.format(
+                    title_id=title_id, review_id=review_id
+                ),
+                'reviews_comment',
+                'comment_review_pub_date_idx',
+            ),
+        )
+        for url, table, index in cases:
+            plan = self.get_plan(self.get_list_query(client, url, table))
+            assert index in plan and 'Sort' not in plan, (
+                f'Проверьте, что список для `{url}` читается по индексу '
+                f'`{index}` в порядке убывания даты публикации без '
+                f'сортировки. План запроса:\n{plan}'
+            )
+
+        plan = self.get_plan(
+            Review.objects.filter(author=user).values('title')
+        )
+        assert 'Unique_review' in plan, (
+            'Проверьте, что отзывы автора выбираются по индексу '
+            f'ограничения `Unique_review`. План запроса:\n{plan}'
+        )
+
+    def test_02_unique_title_genre(self, admin_client):
+        create_titles(admin_client)
+        link = TitleGenre.objects.first()
+        with pytest.raises(IntegrityError), transaction.atomic():
+            TitleGenre.objects.create(title=link.title, genre=link.genre)
+
+    def test_03_name_filter_uses_trigram_index(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/?name=ОРЕШ')
+        assert [
+            title['id'] for title in response.json()['results']
+        ] == [titles[1]['id']], (
+            'Проверьте, что фильтр `name` ищет подстроку без учета регистра.'
+        )
+        url = '/api/v1/titles/?name=ореш'
+        # Полный обход индекса по году тоже не является
+        # последовательным чтением, поэтому запрещается и он.
+        plan = self.get_plan(
+            self.get_list_query(client, url, 'reviews_title'),
+            disabled=('enable_seqscan', 'enable_indexscan'),
+        )
+        assert 'title_name_trgm_idx' in plan and (
+            'Seq Scan on reviews_title' not in plan
+        ), (
+            'Проверьте, что фильтр `name` обслуживается триграммным '
+            f'индексом `title_name_trgm_idx`. План запроса:\n{plan}'
+        )
+
+    def test_04_cursor_page_uses_index_range(self, client, admin_client):
+        create_many_titles(admin_client, 10)
+        url = '/api/v1/titles/?pagination=cursor'
+        next_url = client.get(url).json()['next']
+        plan = self.get_plan(
+            self.get_list_query(client, next_url, 'reviews_title')
+        )
+        assert 'title_year_id_idx' in plan and 'Index Cond: (year <=' in (
+            plan
+        ), (
+            'Проверьте, что следующая страница курсорной пагинации '
+            'читается по диапазону индекса `title_year_id_idx`, а не '
+            f'фильтром по всему индексу. План запроса:\n{plan}'
+        )
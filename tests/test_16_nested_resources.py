@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16NestedResources:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        return response, len(context.captured_queries)
+
+    def test_01_list_queries(self, client, admin_client, admin, user,
+                             user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        urls = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+        )
+        for url in urls:
+            response, queries = self.count_queries(client, url)
+            assert response.status_code == HTTPStatus.OK
+            assert queries <= 3, (
+                f'Проверьте, что GET-запрос к `{url}` не загружает '
+                'родительский объект отдельным запросом: достаточно запроса '
+                'валидаторов, подсчета количества и выборки страницы.'
+            )
+
+    def test_02_parent_not_found(self, client, admin_client, admin, user,
+                                 user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[-1]['id'] + 1)
+        response, queries = self.count_queries(client, url)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert queries == 1, (
+            'Проверьте, что несуществующее произведение в запросе списка '
+            'отзывов обнаруживается тем же запросом, что и валидаторы списка.'
+        )
+
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[1]['id'], review_id=reviews[0]['id']
+        )
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии к отзыву нельзя получить по URL '
+            'с `id` другого произведения.'
+        )
+        response = user_client.post(url, data={'text': 'comment'})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарий нельзя создать по URL с `id` '
+            'другого произведения.'
+        )
+        comment_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        comment_id = client.get(comment_url).json()['results'][0]['id']
+        response = client.get(f'{url}{comment_id}/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_duplicate_review(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        data = {'text': 'review', 'score': 5}
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        review_selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert not review_selects, (
+            f'Проверьте, что POST-запрос к `{self.REVIEWS_URL_TEMPLATE}` '
+            'не проверяет наличие отзыва пользователя отдельным запросом.'
+        )
+
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {
+            'non_field_errors': ['Вы уже оставили отзыв!!!']
+        }, (
+            'Проверьте, что повторный отзыв пользователя на произведение '
+            'отклоняется с прежним сообщением об ошибке.'
+        )
+        assert admin_client.get(url).json()['count'] == 1
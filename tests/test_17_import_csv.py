@@ -0,0 +1,339 @@
+import csv
+import shutil
+from datetime import datetime
+from io import StringIO
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Avg, Count
+from django.test.utils import CaptureQueriesContext
+
+from reviews.management.commands.import_csv import Command
+from reviews.models import (
+    Comment, RatingStats, Review, Title, TitleGenre, TitleRanking
+)
+from users.models import User
+
+BATCH_SIZE = 7
+COMMENT_TEXT_COLUMN = 2
+CSV_FILES = {
+    User: 'users.csv',
+    Title: 'titles.csv',
+    Review: 'review.csv',
+    Comment: 'comments.csv',
+    TitleGenre: 'genre_title.csv',
+}
+
+
+def count_csv_rows(file_name):
+    path = f'{settings.BASE_DIR}/static/data/{file_name}'
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        return sum(1 for _ in csv.reader(csv_file)) - 1
+
+
+def rewrite_csv_row(path, row_id, changes):
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        rows = list(csv.reader(csv_file))
+    for row in rows[1:]:
+        if row[0] == str(row_id):
+            for column, value in changes.items():
+                row[column] = value
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        csv.writer(csv_file).writerows(rows)
+
+
+def get_title_dates():
+    return dict(Title.objects.values_list('pk', 'modified_date'))
+
+
+def import_csv(**options):
+    output = StringIO()
+    with CaptureQueriesContext(connection) as context:
+        call_command('import_csv', stdout=output, **options)
+    return output.getvalue(), context.captured_queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ImportCsv:
+
+    def test_01_import(self, user_client):
+        _, queries = import_csv(batch_size=BATCH_SIZE)
+        reviews_count = Review.objects.count()
+        assert reviews_count and Comment.objects.exists()
+        assert TitleGenre.objects.exists()
+        inserts = [
+            query for query in queries
+            if query['sql'].startswith('INSERT INTO "reviews_review"')
+        ]
+        assert len(inserts) == -(-reviews_count // BATCH_SIZE), (
+            'Проверьте, что команда `import_csv` создает отзывы одним '
+            'INSERT-запросом на пакет.'
+        )
+
+        for title in Title.objects.annotate(
+            average=Avg('reviews__score'), count=Count('reviews')
+        ):
+            assert title.rating_count == title.count
+            assert title.rating == pytest.approx(title.average), (
+                'Проверьте, что после импорта рейтинг произведений '
+                'пересчитывается по загруженным отзывам.'
+            )
+        stats = RatingStats.objects.get()
+        assert stats.score_count == reviews_count
+        assert not Title.objects.filter(
+            rating__isnull=False, weighted_rating__isnull=True
+        ).exists()
+        assert not Title.objects.filter(search_vector__isnull=True).exists()
+        assert TitleRanking.objects.exists(), (
+            'Проверьте, что после импорта перестраиваются рейтинги лучших '
+            'произведений.'
+        )
+
+        title = Title.objects.create(name='Новое произведение', year=2000)
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'review', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что после импорта последовательности id сдвигаются '
+            'за загруженные id.'
+        )
+
+    def test_02_repeated_import(self):
+        import_csv()
+        counts = {
+            model: model.objects.count()
+            for model in (User, Title, Review, Comment, TitleGenre)
+        }
+        output, queries = import_csv(batch_size=BATCH_SIZE)
+        assert {
+            model: model.objects.count() for model in counts
+        } == counts, (
+            'Проверьте, что повторный импорт не создает существующие объекты.'
+        )
+        assert not any(
+            query['sql'].startswith('INSERT') for query in queries
+        )
+        assert 'импортировано 0' in output
+
+    def test_03_invalid_batch_size(self):
+        with pytest.raises(CommandError):
+            import_csv(batch_size=0)
+
+    def test_04_copy(self):
+        output, _ = import_csv(copy=True)
+        assert 'пакет' not in output and 'COPY' in output
+        copied = {
+            model: model.objects.count()
+            for model in (User, Title, Review, Comment, TitleGenre)
+        }
+        assert all(copied.values())
+        assert not Title.objects.filter(search_vector__isnull=True).exists()
+        assert TitleRanking.objects.exists()
+
+        output, _ = import_csv(copy=True)
+        assert {
+            model: model.objects.count() for model in copied
+        } == copied, (
+            'Проверьте, что повторный импорт в режиме `--copy` пропускает '
+            'существующие объекты.'
+        )
+        assert 'импортировано 0' in output
+
+        Review.objects.all().delete()
+        import_csv()
+        assert Review.objects.count() == copied[Review], (
+            'Проверьте, что режимы `--copy` и пакетной загрузки загружают '
+            'одинаковые данные.'
+        )
+
+    def test_05_copy_fallback(self, monkeypatch):
+        monkeypatch.setattr(connection, 'vendor', 'sqlite')
+        output, _ = import_csv(copy=True)
+        assert 'пакет 1' in output and Review.objects.exists(), (
+            'Проверьте, что режим `--copy` на других СУБД переключается на '
+            'пакетную загрузку.'
+        )
+
+    @pytest.mark.parametrize('copy', (False, True))
+    def test_06_parallel(self, copy):
+        output, _ = import_csv(jobs=3, batch_size=BATCH_SIZE, copy=copy)
+        for model, file_name in CSV_FILES.items():
+            assert model.objects.count() == count_csv_rows(file_name), (
+                'Проверьте, что команда `import_csv` с параметром `--jobs` '
+                'загружает все строки csv-файлов.'
+            )
+        assert 'часть 2' in output, (
+            'Проверьте, что с параметром `--jobs` файлы загружаются '
+            'частями по `--batch-size` строк.'
+        )
+        for title in Title.objects.annotate(count=Count('reviews')):
+            assert title.rating_count == title.count
+        assert TitleRanking.objects.exists()
+
+        output, _ = import_csv(jobs=3, batch_size=BATCH_SIZE, copy=copy)
+        assert 'Рейтинги' not in output
+
+    def test_07_invalid_jobs(self):
+        with pytest.raises(CommandError):
+            import_csv(jobs=0)
+
+    @pytest.mark.parametrize('copy', (False, True))
+    def test_08_upsert(self, copy, tmp_path, monkeypatch):
+        data_dir = tmp_path / 'data'
+        shutil.copytree(f'{settings.BASE_DIR}/static/data', data_dir)
+        monkeypatch.setattr(
+            'reviews.management.commands.import_csv.DATA_DIR', str(data_dir)
+        )
+        import_csv(upsert=True, copy=copy, batch_size=BATCH_SIZE)
+        reviews_count = Review.objects.count()
+        assert reviews_count == count_csv_rows('review.csv')
+        modified = dict(Review.objects.values_list('pk', 'modified_date'))
+
+        output, _ = import_csv(upsert=True, copy=copy, batch_size=BATCH_SIZE)
+        assert 'Рейтинги' not in output
+        assert dict(
+            Review.objects.values_list('pk', 'modified_date')
+        ) == modified, (
+            'Проверьте, что повторный импорт в режиме `--upsert` не '
+            'записывает строки, которые не изменились.'
+        )
+
+        review = Review.objects.order_by('pk').first()
+        new_score = review.score - 1 if review.score > 1 else 2
+        rewrite_csv_row(
+            data_dir / 'review.csv', review.pk,
+            {2: 'Исправленный текст', 4: str(new_score)},
+        )
+        title_dates = get_title_dates()
+
+        output, _ = import_csv(upsert=True, copy=copy, batch_size=BATCH_SIZE)
+        assert 'обновлено 1' in output
+        updated = Review.objects.get(pk=review.pk)
+        assert (updated.text, updated.score) == (
+            'Исправленный текст', new_score
+        ), (
+            'Проверьте, что импорт в режиме `--upsert` обновляет '
+            'измененные строки.'
+        )
+        assert updated.modified_date > modified[review.pk]
+        assert [
+            pk for pk, modified_date in Review.objects.values_list(
+                'pk', 'modified_date'
+            )
+            if modified_date != modified[pk]
+        ] == [review.pk], (
+            'Проверьте, что импорт в режиме `--upsert` не записывает '
+            'строки, которые не изменились.'
+        )
+        title = Title.objects.get(pk=updated.title_id)
+        assert title.rating == pytest.approx(
+            title.reviews.aggregate(average=Avg('score'))['average']
+        )
+        assert [
+            pk for pk, modified_date in get_title_dates().items()
+            if modified_date != title_dates[pk]
+        ] == [title.pk], (
+            'Проверьте, что после импорта в режиме `--upsert` производные '
+            'данные пересчитываются только для произведений измененных '
+            'отзывов.'
+        )
+
+    @pytest.mark.parametrize('copy', (False, True))
+    def test_09_upsert_keeps_unrelated_titles(self, copy, tmp_path,
+                                              monkeypatch):
+        data_dir = tmp_path / 'data'
+        shutil.copytree(f'{settings.BASE_DIR}/static/data', data_dir)
+        monkeypatch.setattr(
+            'reviews.management.commands.import_csv.DATA_DIR', str(data_dir)
+        )
+        import_csv(upsert=True, copy=copy)
+        title_dates = get_title_dates()
+        comment = Comment.objects.order_by('pk').first()
+        rewrite_csv_row(
+            data_dir / 'comments.csv', comment.pk,
+            {COMMENT_TEXT_COLUMN: 'Исправленный комментарий'},
+        )
+
+        output, queries = import_csv(upsert=True, copy=copy)
+        assert 'обновлено 1' in output
+        assert Comment.objects.get(pk=comment.pk).text == (
+            'Исправленный комментарий'
+        )
+        assert get_title_dates() == title_dates, (
+            'Проверьте, что изменение комментария при импорте в режиме '
+            '`--upsert` не меняет дату изменения произведений.'
+        )
+        assert 'Рейтинги' not in output
+        assert not any(
+            RatingStats._meta.db_table in query['sql'] for query in queries
+        ), (
+            'Проверьте, что общая статистика оценок пересчитывается, '
+            'только если изменились отзывы.'
+        )
+
+    @pytest.mark.parametrize('options', (
+        {},
+        {'copy': True},
+        {'upsert': True},
+        {'upsert': True, 'copy': True},
+        {'jobs': 3, 'batch_size': BATCH_SIZE},
+    ))
+    def test_10_pub_date_from_csv(self, options):
+        path = f'{settings.BASE_DIR}/static/data/review.csv'
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            expected = {
+                int(row['id']): datetime.fromisoformat(
+                    row['pub_date'].replace('Z', '+00:00')
+                )
+                for row in csv.DictReader(csv_file)
+            }
+        import_csv(**options)
+        assert dict(
+            Review.objects.values_list('pk', 'pub_date')
+        ) == expected, (
+            'Проверьте, что во всех режимах команда `import_csv` сохраняет '
+            'дату публикации из csv-файла.'
+        )
+        assert Review._meta.get_field('pub_date').auto_now_add
+
+    def test_11_failed_import_keeps_derived_data(self, monkeypatch):
+        def fail(command):
+            raise RuntimeError('Ошибка загрузки')
+
+        monkeypatch.setattr(Command, 'import_genre_title', fail)
+        with pytest.raises(RuntimeError):
+            import_csv(batch_size=BATCH_SIZE)
+        assert Review.objects.exists() and not TitleGenre.objects.exists()
+        for title in Title.objects.annotate(count=Count('reviews')):
+            assert title.rating_count == title.count, (
+                'Проверьте, что после ошибки импорта рейтинги пересчитываются '
+                'по уже загруженным отзывам.'
+            )
+        assert RatingStats.objects.get().score_count == Review.objects.count()
+        assert not Title.objects.filter(search_vector__isnull=True).exists()
+        Title.objects.create(name='Новое произведение', year=2000)
+
+    def test_12_full_import_refreshes_whole_table(self):
+        _, queries = import_csv(batch_size=BATCH_SIZE)
+        ranking_table = TitleRanking._meta.db_table
+        assert any(
+            query['sql'].startswith(f'INSERT INTO "{ranking_table}"')
+            and 'ROW_NUMBER()' in query['sql']
+            for query in queries
+        ), (
+            'Проверьте, что после загрузки большей части произведений '
+            'рейтинги групп перестраиваются целиком.'
+        )
+        assert not any(
+            query['sql'].startswith('UPDATE "reviews_title"')
+            and '"reviews_title"."id" IN (' in query['sql']
+            for query in queries
+        ), (
+            'Проверьте, что после загрузки большей части произведений '
+            'производные данные пересчитываются без списка id.'
+        )
+        assert TitleRanking.objects.exists()
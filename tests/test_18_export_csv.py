@@ -0,0 +1,145 @@
+import csv
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from reviews.management.commands.export_csv import Command
+from reviews.models import Comment, Review, Title, TitleGenre
+from users.models import User
+
+CSV_FILES = (
+    'users.csv',
+    'category.csv',
+    'genre.csv',
+    'titles.csv',
+    'review.csv',
+    'comments.csv',
+    'genre_title.csv',
+)
+
+
+def read_csv(path, opener=open):
+    with opener(path, 'rt', encoding='utf-8', newline='') as csv_file:
+        header, *rows = csv.reader(csv_file)
+    return header, [
+        [
+            parse_datetime(value) if column == 'pub_date' else value
+            for column, value in zip(header, row)
+        ]
+        for row in sorted(rows, key=lambda row: int(row[0]))
+    ]
+
+
+def call(command, *args, **options):
+    output = StringIO()
+    call_command(command, *args, stdout=output, **options)
+    return output.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ExportCsv:
+
+    def test_01_same_layout_as_import(self, tmp_path):
+        call('import_csv', copy=True)
+        call('export_csv', str(tmp_path), chunk_size=10)
+        for file_name in CSV_FILES:
+            assert read_csv(tmp_path / file_name) == read_csv(
+                f'{settings.BASE_DIR}/static/data/{file_name}'
+            ), (
+                f'Проверьте, что команда `export_csv` выгружает `{file_name}` '
+                'в том же формате, что читает `import_csv`.'
+            )
+
+    def test_02_round_trip_gzip(self, tmp_path, monkeypatch):
+        call('import_csv')
+        counts = {
+            model: model.objects.count()
+            for model in (User, Title, Review, Comment, TitleGenre)
+        }
+        call('export_csv', str(tmp_path / 'gz'), gzip=True)
+        call('export_csv', str(tmp_path / 'plain'))
+        for file_name in CSV_FILES:
+            assert read_csv(
+                tmp_path / 'gz' / f'{file_name}.gz', gzip.open
+            ) == read_csv(tmp_path / 'plain' / file_name), (
+                'Проверьте, что команда `export_csv` с параметром `--gzip` '
+                'записывает сжатые файлы с теми же данными.'
+            )
+
+        for model in (TitleGenre, Comment, Review, Title, User):
+            model.objects.all().delete()
+        monkeypatch.setattr(
+            'reviews.management.commands.import_csv.DATA_DIR',
+            str(tmp_path / 'plain'),
+        )
+        call('import_csv')
+        assert {
+            model: model.objects.count() for model in counts
+        } == counts, (
+            'Проверьте, что файлы, выгруженные командой `export_csv`, '
+            'загружаются командой `import_csv`.'
+        )
+
+    def test_03_since(self, tmp_path):
+        call('import_csv')
+        since = timezone.now()
+        review = Review.objects.order_by('pk').first()
+        review.score = review.score - 1 if review.score > 1 else 2
+        review.save()
+        call('export_csv', str(tmp_path), since=since.isoformat())
+
+        _, reviews = read_csv(tmp_path / 'review.csv')
+        assert [row[0] for row in reviews] == [str(review.pk)], (
+            'Проверьте, что команда `export_csv` с параметром `--since` '
+            'выгружает только измененные с этого момента строки.'
+        )
+        _, titles = read_csv(tmp_path / 'titles.csv')
+        assert [row[0] for row in titles] == [str(review.title_id)], (
+            'Проверьте, что команда `export_csv` с параметром `--since` '
+            'выгружает произведения, рейтинг которых изменился с этого '
+            'момента, и только их.'
+        )
+        _, comments = read_csv(tmp_path / 'comments.csv')
+        assert comments == []
+        _, users = read_csv(tmp_path / 'users.csv')
+        assert len(users) == User.objects.count()
+
+    def test_04_invalid_options(self, tmp_path):
+        with pytest.raises(CommandError):
+            call('export_csv', str(tmp_path), since='вчера')
+        with pytest.raises(CommandError):
+            call('export_csv', str(tmp_path), chunk_size=0)
+
+    def test_05_consistent_snapshot(self, tmp_path, monkeypatch):
+        call('import_csv')
+        comments_count = Comment.objects.count()
+        export_titles = Command.export_titles
+
+        def delete_comments():
+            try:
+                Comment.objects.all().delete()
+            finally:
+                connection.close()
+
+        def export_titles_during_delete(command):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(delete_comments).result()
+            export_titles(command)
+
+        monkeypatch.setattr(
+            Command, 'export_titles', export_titles_during_delete
+        )
+        call('export_csv', str(tmp_path))
+        assert not Comment.objects.exists()
+        _, rows = read_csv(tmp_path / 'comments.csv')
+        assert len(rows) == comments_count, (
+            'Проверьте, что команда `export_csv` выгружает все таблицы '
+            'из одного снимка базы данных.'
+        )